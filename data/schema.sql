@@ -2,7 +2,8 @@ CREATE TABLE IF NOT EXISTS users (
     id INT AUTO_INCREMENT PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_deleted BOOLEAN DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS history (
@@ -17,7 +18,9 @@ CREATE TABLE IF NOT EXISTS history (
     draw_date DATE,
     first_prize_auto INT DEFAULT 0,
     first_prize_manual INT DEFAULT 0,
-    first_prize_semi_auto INT DEFAULT 0
+    first_prize_semi_auto INT DEFAULT 0,
+    combo_mask BIGINT UNSIGNED,
+    INDEX idx_history_combo_mask (combo_mask)
 );
 
 CREATE TABLE IF NOT EXISTS my_predictions (
@@ -30,12 +33,16 @@ CREATE TABLE IF NOT EXISTS my_predictions (
     num4 INT,
     num5 INT,
     num6 INT,
+    combo_mask BIGINT UNSIGNED,
     rank_val VARCHAR(20),
     matched_count INT,
     bonus_matched BOOLEAN,
     memo TEXT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     is_deleted BOOLEAN DEFAULT 0,
+    INDEX idx_predictions_user_round_combo (user_id, round_no, combo_mask),
+    INDEX idx_predictions_user_active_created (user_id, is_deleted, created_at),
+    INDEX idx_predictions_rank_round (rank_val, round_no),
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -55,5 +62,18 @@ CREATE TABLE IF NOT EXISTS prizes (
     total_price BIGINT,
     winner_count INT,
     win_amount BIGINT,
+    UNIQUE KEY uq_prizes_round_rank (round_no, rank_no),
     FOREIGN KEY (round_no) REFERENCES history(round_no)
 );
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    description VARCHAR(255),
+    applied_at VARCHAR(30)
+);
+
+-- A database created from this file already has every migration in src/migrations.py
+INSERT IGNORE INTO schema_migrations (version, description, applied_at) VALUES
+    (1, 'Prediction grading columns and soft-delete flags', NOW()),
+    (2, 'Combination bitmask columns (see src/bitmask.py)', NOW()),
+    (3, 'Indexes for hot web and auditor queries', NOW());
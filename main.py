@@ -31,6 +31,38 @@ def main():
     
     # web
     web_parser = subparsers.add_parser("web", help="Start Web UI")
+
+    # inference
+    inference_parser = subparsers.add_parser("inference", help="Run the inference worker serving predictions to web workers")
+
+    # bench
+    bench_parser = subparsers.add_parser("bench", help="Benchmark encoding, training, inference and sampling on synthetic history")
+    bench_parser.add_argument("--rounds", type=int, nargs="+", default=[1200], help="History sizes to benchmark")
+    bench_parser.add_argument("--repeats", type=int, default=5, help="Repetitions per timing (median is reported)")
+    bench_parser.add_argument("--output", help="Write results as JSON to this file")
+    bench_parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+
+    # combo_index
+    combo_parser = subparsers.add_parser("combo_index", help="Build the statistics index over all 8,145,060 combinations")
+
+    # backtest
+    backtest_parser = subparsers.add_parser("backtest", help="Walk-forward backtest of prediction strategies against past draws")
+    backtest_parser.add_argument("--strategies", nargs="+", default=["lstm", "frequency", "uniform"],
+                                 choices=["lstm", "frequency", "uniform"], help="Strategies to compare")
+    backtest_parser.add_argument("--sets", type=int, default=5, help="Sets generated per round")
+    backtest_parser.add_argument("--from", dest="start_round", type=int, help="First round to predict (optional)")
+    backtest_parser.add_argument("--to", dest="end_round", type=int, help="Last round to predict (optional)")
+    backtest_parser.add_argument("--mode", choices=["incremental", "retrain"], default="incremental",
+                                 help="LSTM: fine-tune one model as rounds pass, or retrain from scratch per block")
+    backtest_parser.add_argument("--retrain-every", type=int, help="LSTM: rounds per training block")
+    backtest_parser.add_argument("--epochs", type=int, help="LSTM: max epochs for a full training run")
+    backtest_parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    backtest_parser.add_argument("--seed", type=int, default=0)
+    backtest_parser.add_argument("--output", help="Write the report as JSON to this file")
+    backtest_parser.add_argument("--no-cache", action="store_true", help="Ignore cached LSTM probability vectors")
+
+    # migrate
+    migrate_parser = subparsers.add_parser("migrate", help="Apply pending database schema migrations")
     
     args = parser.parse_args()
     
@@ -79,6 +111,32 @@ def main():
         print("Starting model training...")
         run_analyst(mode='train')
         
+    elif args.command == "inference":
+        from src.inference_server import serve
+        serve()
+
+    elif args.command == "bench":
+        from src.bench import run_benchmarks
+        run_benchmarks(rounds=args.rounds, repeats=args.repeats, output=args.output, compare=args.compare)
+
+    elif args.command == "combo_index":
+        from src.combo_index import build_combo_index
+        build_combo_index()
+
+    elif args.command == "backtest":
+        from src.backtest import run_backtest, BACKTEST_RETRAIN_EVERY, BACKTEST_EPOCHS
+        run_backtest(
+            strategies=args.strategies, num_sets=args.sets,
+            start_round=args.start_round, end_round=args.end_round,
+            mode=args.mode, retrain_every=args.retrain_every or BACKTEST_RETRAIN_EVERY,
+            epochs=args.epochs or BACKTEST_EPOCHS, workers=args.workers, seed=args.seed,
+            output=args.output, use_cache=not args.no_cache,
+        )
+
+    elif args.command == "migrate":
+        from src.migrations import run_migrations
+        run_migrations()
+
     elif args.command == "web":
         print("Starting Web UI...")
         import uvicorn
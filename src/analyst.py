@@ -1,27 +1,40 @@
 import sqlite3
 import random
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import os
+import hashlib
+import itertools
+import threading
 from datetime import datetime
 from collections import Counter
 from src.database import get_connection
+from src.history_store import load_encoded_history
+from src.bitmask import to_mask
+from src.sampler import sample_unique
 from src.notifier import send_message
 
 # Suppress TensorFlow warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
-
-
+# TensorFlow itself is imported inside the functions that build, train or load
+# the model, so processes that never touch the model (web workers serving
+# pages, the collector) do not pay its startup time and memory.
 
 # Constants for Hyperparameters and Model Path
 MODEL_PATH = 'data/lotto_model.keras'
 SEQUENCE_LENGTH = 10
-EPOCHS_NEW = 100
+EPOCHS_NEW = 100     # upper bounds; early stopping usually ends training sooner
 EPOCHS_UPDATE = 10
 BATCH_SIZE = 32
 
+# Training pipeline settings
+TRAIN_THREADS = int(os.getenv('TRAIN_THREADS', 0))             # 0 = let TensorFlow decide
+VALIDATION_SPLIT = float(os.getenv('TRAIN_VALIDATION_SPLIT', 0.1))  # newest windows held out
+EARLY_STOPPING_PATIENCE = int(os.getenv('TRAIN_EARLY_STOPPING_PATIENCE', 5))
+MIN_VALIDATION_WINDOWS = 20
+# Per-epoch backup so a restarted run resumes instead of starting over
+TRAIN_CHECKPOINT_DIR = 'data/train_checkpoint'
+
 def load_history():
     """Loads all history data from the database."""
     conn = get_connection()
@@ -31,35 +44,53 @@ def load_history():
     conn.close()
     return rows
 
+def encode_draws(history_data):
+    """Multi-hot encodes draws into an (n, 45) uint8 array."""
+    n = len(history_data)
+    if n == 0:
+        return np.zeros((0, 45), dtype=np.uint8)
+    nums = np.fromiter(
+        itertools.chain.from_iterable(row.values() for row in history_data),
+        dtype=np.int16
+    ).reshape(n, -1)
+
+    encoded = np.zeros((n, 45), dtype=np.uint8)
+    rows = np.broadcast_to(np.arange(n)[:, None], nums.shape)
+    valid = (nums >= 1) & (nums <= 45)
+    encoded[rows[valid], nums[valid] - 1] = 1
+    return encoded
+
+def prepare_windows(encoded_draws, sequence_length=5):
+    """Builds LSTM windows over encoded draws.
+
+    X is a zero-copy sliding-window view over the (n, 45) array, so each draw
+    is stored once instead of sequence_length times.
+    """
+    encoded_draws = np.asarray(encoded_draws).astype('float32', copy=False)
+    if len(encoded_draws) <= sequence_length:
+        return (np.zeros((0, sequence_length, 45), dtype='float32'),
+                np.zeros((0, 45), dtype='float32'))
+
+    # (n - seq + 1, 45, seq) -> drop the last window (no target) -> (n - seq, seq, 45)
+    windows = sliding_window_view(encoded_draws, sequence_length, axis=0)
+    X = windows[:-1].transpose(0, 2, 1)
+    y = encoded_draws[sequence_length:]
+    return X, y
+
 def prepare_data(history_data, sequence_length=5):
-    """Prepares data for LSTM model."""
-    # Convert list of dicts to list of lists (sorted numbers)
-    draws = []
-    for row in history_data:
-        # Extract values and sort
-        nums = sorted([v for v in row.values()])
-        draws.append(nums)
-    
-    # Multi-hot encoding manually
-    encoded_draws = []
-    for draw in draws:
-        encoded = [0] * 45
-        for num in draw:
-            if 1 <= num <= 45:
-                encoded[num-1] = 1
-        encoded_draws.append(encoded)
-    
-    encoded_draws = np.array(encoded_draws)
-    
-    X, y = [], []
-    for i in range(len(encoded_draws) - sequence_length):
-        X.append(encoded_draws[i:i+sequence_length])
-        y.append(encoded_draws[i+sequence_length])
-        
-    return np.array(X).astype('float32'), np.array(y).astype('float32')
+    """Prepares data for LSTM model.
+
+    history_data is either a list of draw rows or an already encoded (n, 45) array.
+    """
+    if not isinstance(history_data, np.ndarray):
+        history_data = encode_draws(history_data)
+    return prepare_windows(history_data, sequence_length)
 
 def create_model(input_shape):
     """Creates an LSTM model."""
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
+
     model = Sequential([
         Input(shape=input_shape),
         LSTM(128, return_sequences=True),
@@ -72,70 +103,181 @@ def create_model(input_shape):
     model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
     return model
 
+def configure_training_threads(threads=TRAIN_THREADS):
+    """Caps TensorFlow's CPU thread pools. Only effective before TF runs its first op."""
+    if threads <= 0:
+        return
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(max(1, threads // 2))
+    except RuntimeError as e:
+        print(f"Could not set TensorFlow thread counts: {e}")
+
+def make_window_dataset(encoded, start, end, sequence_length=SEQUENCE_LENGTH,
+                        batch_size=BATCH_SIZE, shuffle=False):
+    """tf.data pipeline over windows start..end-1 of the encoded draws.
+
+    Window i is (draws[i:i+seq], draws[i+seq]). Windows are sliced on the fly
+    from the single (n, 45) tensor, cached after the first epoch and
+    prefetched while the model trains on the previous batch.
+    """
+    import tensorflow as tf
+
+    draws = tf.constant(np.asarray(encoded, dtype='float32'))
+    ds = tf.data.Dataset.range(start, end).map(
+        lambda i: (draws[i:i + sequence_length], draws[i + sequence_length]),
+        num_parallel_calls=tf.data.AUTOTUNE
+    ).cache()
+    if shuffle:
+        ds = ds.shuffle(end - start, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def make_training_datasets(encoded, sequence_length=SEQUENCE_LENGTH,
+                           validation_split=VALIDATION_SPLIT, batch_size=BATCH_SIZE):
+    """Returns (train_ds, val_ds or None, n_train, n_val).
+
+    The split is chronological: the newest windows are held out for
+    validation, as they are the closest to what the model has to predict.
+    """
+    n_windows = max(len(encoded) - sequence_length, 0)
+    n_val = int(n_windows * validation_split)
+    if n_val < MIN_VALIDATION_WINDOWS:
+        n_val = 0
+    n_train = n_windows - n_val
+
+    train_ds = make_window_dataset(encoded, 0, n_train, sequence_length, batch_size, shuffle=True)
+    val_ds = make_window_dataset(encoded, n_train, n_windows, sequence_length, batch_size) if n_val else None
+    return train_ds, val_ds, n_train, n_val
+
 def train_model(history_data, fine_tune=True):
-    """Trains or fine-tunes the LSTM model."""
+    """Trains or fine-tunes the LSTM model.
+
+    Runs until validation loss stops improving (at most EPOCHS_NEW/EPOCHS_UPDATE
+    epochs) and backs up every epoch to TRAIN_CHECKPOINT_DIR, so an interrupted
+    run picks up where it stopped.
+    """
+    import tensorflow as tf
+
+    configure_training_threads()
+
     print("Preparing data for training...")
-    X, y = prepare_data(history_data, SEQUENCE_LENGTH)
+    encoded = history_data if isinstance(history_data, np.ndarray) else encode_draws(history_data)
+    train_ds, val_ds, n_train, n_val = make_training_datasets(encoded)
     
-    if len(X) == 0:
+    if n_train == 0:
         print("Not enough data to train model.")
         return
 
     if fine_tune and os.path.exists(MODEL_PATH):
         print(f"Loading existing model from {MODEL_PATH} for fine-tuning...")
-        model = load_model(MODEL_PATH)
+        model = tf.keras.models.load_model(MODEL_PATH)
         epochs = EPOCHS_UPDATE
     else:
         print("Creating and training new model...")
         model = create_model((SEQUENCE_LENGTH, 45))
         epochs = EPOCHS_NEW
+
+    callbacks = [tf.keras.callbacks.BackupAndRestore(backup_dir=TRAIN_CHECKPOINT_DIR)]
+    if val_ds is not None:
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=EARLY_STOPPING_PATIENCE, restore_best_weights=True, verbose=1
+        ))
     
-    print(f"Training model for {epochs} epochs...")
-    model.fit(X, y, epochs=epochs, batch_size=BATCH_SIZE, verbose=1)
+    print(f"Training model for up to {epochs} epochs ({n_train} training / {n_val} validation windows)...")
+    # train_ds already reshuffles every epoch
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks,
+                        shuffle=False, verbose=2)
+    print(f"Training stopped after {len(history.epoch)} epochs.")
     
-    model.save(MODEL_PATH)
+    # Save next to the target and swap it in atomically so web workers
+    # polling the file never load a half-written model.
+    tmp_path = MODEL_PATH.replace('.keras', '.tmp.keras')
+    model.save(tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
     print(f"Model saved to {MODEL_PATH}")
 
-def generate_numbers_ml(history_data):
-    """Generates prediction numbers using LSTM model (Prediction Only)."""
-    # Just load and predict. No training here.
-    
-    if not os.path.exists(MODEL_PATH):
-        print(f"Model not found at {MODEL_PATH}. Cannot predict.")
-        return []
-        
-    print(f"Loading model from {MODEL_PATH}...")
-    model = load_model(MODEL_PATH)
-    
-    # Prepare data just for the last sequence
-    # optimizing prepare_data is possible but reusing is fine for now
-    X, y = prepare_data(history_data, SEQUENCE_LENGTH)
-    
-    if len(X) == 0:
+class LottoPredictor:
+    """Process-wide holder for the trained model.
+
+    The model is loaded once per worker and reloaded only when the file on
+    disk changes (e.g. after the weekly `main.py train` run).
+    """
+
+    def __init__(self, model_path=MODEL_PATH):
+        self.model_path = model_path
+        self.model = None
+        self.version = None
+        self._file_stamp = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.model_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get_model(self):
+        """Returns the current model, hot-swapping it if the file changed."""
+        stamp = self._stat()
+        if stamp is None:
+            return None
+        if stamp == self._file_stamp:
+            return self.model
+
+        with self._lock:
+            if stamp != self._file_stamp:
+                with open(self.model_path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:12]
+                if digest != self.version:
+                    print(f"Loading model from {self.model_path} (version {digest})...")
+                    from tensorflow.keras.models import load_model
+                    self.model = load_model(self.model_path)
+                    self.version = digest
+                self._file_stamp = stamp
+        return self.model
+
+    def predict_probs(self, history_data):
+        """Returns the 45-way probability vector for the draw after history_data."""
+        model = self.get_model()
+        if model is None:
+            print(f"Model not found at {self.model_path}. Cannot predict.")
+            return None
+        if len(history_data) < SEQUENCE_LENGTH:
+            return None
+
+        # Only the last SEQUENCE_LENGTH draws are needed as model input.
+        last_sequence = history_data[-SEQUENCE_LENGTH:]
+        if not isinstance(last_sequence, np.ndarray):
+            last_sequence = encode_draws(last_sequence)
+        last_sequence = last_sequence.astype('float32')[None]
+        # Calling the model directly avoids the per-call setup of model.predict.
+        return np.asarray(model(last_sequence, training=False))[0]
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+def get_predictor():
+    """Returns the predictor shared by all requests in this process."""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = LottoPredictor()
+    return _predictor
+
+def generate_numbers_ml(history_data, num_sets=5, seed=None):
+    """Generates prediction numbers using LSTM model (Prediction Only).
+
+    Returns up to num_sets unique sorted combinations; pass seed for a
+    reproducible draw.
+    """
+    # Just predict with the cached model. No training here.
+    predicted_probs = get_predictor().predict_probs(history_data)
+    if predicted_probs is None:
         return []
-        
-    last_sequence = X[-1].reshape(1, SEQUENCE_LENGTH, 45)
-    
-    predictions = []
-    
-    predicted_probs = model.predict(last_sequence, verbose=0)[0]
-    
-    attempts = 0
-    num_sets = 5
-    while len(predictions) < num_sets and attempts < num_sets * 20:
-        attempts += 1
-        candidates = np.random.choice(
-            range(1, 46), 
-            size=6, 
-            replace=False, 
-            p=predicted_probs / predicted_probs.sum()
-        )
-        candidates = sorted(candidates.tolist())
-        
-        if candidates not in predictions:
-            predictions.append(candidates)
-            
-    return predictions
+    return sample_unique(predicted_probs, num_sets, rng=seed).tolist()
 
 def save_predictions(round_no, predictions, user_id=None):
     """Saves the generated predictions to the database."""
@@ -146,14 +288,26 @@ def save_predictions(round_no, predictions, user_id=None):
     
     for nums in predictions:
         cursor.execute('''
-            INSERT INTO my_predictions (round_no, num1, num2, num3, num4, num5, num6, user_id, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (round_no, nums[0], nums[1], nums[2], nums[3], nums[4], nums[5], user_id, created_at))
+            INSERT INTO my_predictions (round_no, num1, num2, num3, num4, num5, num6, combo_mask, user_id, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ''', (round_no, nums[0], nums[1], nums[2], nums[3], nums[4], nums[5], to_mask(nums), user_id, created_at))
     
     conn.commit()
     conn.close()
     print(f"Saved {len(predictions)} predictions for round {round_no} (User ID: {user_id})")
 
+def get_picked_masks(user_id, round_no):
+    """Returns the bitmasks of every combination the user already saved for the round."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'SELECT combo_mask FROM my_predictions WHERE user_id = %s AND round_no = %s AND is_deleted = 0',
+        (user_id, round_no)
+    )
+    masks = {int(row['combo_mask']) for row in cursor.fetchall() if row['combo_mask'] is not None}
+    conn.close()
+    return masks
+
 def run_analyst(user_id=None, mode='predict'):
     """
     Main function to run the analyst agent.
@@ -174,10 +328,9 @@ def run_analyst(user_id=None, mode='predict'):
     target_round = last_round + 1
     print(f"Generating predictions for round {target_round} using LSTM...")
     
-    # 2. Load data
-    history = load_history()
-    
+    # 2. Train (full history is only needed here, read from the encoded store)
     if mode == 'train':
+        history = load_encoded_history()
         train_model(history)
         # After training, we might also want to predict or just exit.
         # Let's predict too if it's the weekly run.
@@ -185,8 +338,11 @@ def run_analyst(user_id=None, mode='predict'):
         # Let's just return if training only.
         print("Training completed.")
     
-    # 3. Generate
-    predictions = generate_numbers_ml(history)
+    # 3. Generate via the shared inference worker (falls back to in-process)
+    from src.inference_server import generate_predictions
+    # Skip combinations this user already holds for the round
+    exclude = get_picked_masks(user_id, target_round) if user_id else None
+    predictions = generate_predictions(last_round, exclude=exclude)
     print(f"Generated: {predictions}")
     
     # 4. Save
@@ -1,12 +1,26 @@
 import sqlite3
+import numpy as np
+from collections import Counter
 from src.database import get_connection
 from src.notifier import send_message
+from src.bitmask import to_mask, masks_from_array, match_counts
 
-def get_pending_predictions():
+# Index = rank code from grade_predictions (0: no win ... 5: 1st prize)
+RANK_LABELS = np.array(["낙첨", "5등", "4등", "3등", "2등", "1등"])
+
+# Ids per UPDATE ... WHERE id IN (...) statement
+UPDATE_CHUNK_SIZE = 1000
+
+def get_pending_predictions(round_no=None):
     """Retrieves predictions that haven't been checked yet."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT id, round_no, num1, num2, num3, num4, num5, num6 FROM my_predictions WHERE rank_val = "미추첨"')
+    query = 'SELECT id, round_no, num1, num2, num3, num4, num5, num6 FROM my_predictions WHERE rank_val = %s'
+    params = ["미추첨"]
+    if round_no:
+        query += ' AND round_no = %s'
+        params.append(round_no)
+    cursor.execute(query, params)
     rows = cursor.fetchall()
     conn.close()
     return rows
@@ -24,6 +38,24 @@ def get_win_numbers(round_no):
         return win_nums, result['bonus']
     return None, None
 
+def get_win_numbers_bulk(round_nos):
+    """Retrieves winning numbers for many rounds in one query: {round_no: (win_nums, bonus)}."""
+    if not round_nos:
+        return {}
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ', '.join(['%s'] * len(round_nos))
+    cursor.execute(
+        f'SELECT round_no, num1, num2, num3, num4, num5, num6, bonus FROM history WHERE round_no IN ({placeholders})',
+        list(round_nos)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return {
+        row['round_no']: ([row[f'num{i}'] for i in range(1, 7)], row['bonus'])
+        for row in rows
+    }
+
 def calculate_rank(my_nums, win_nums, bonus):
     """Calculates the rank based on matching numbers."""
     match_count = len(my_nums & win_nums)
@@ -42,57 +74,82 @@ def calculate_rank(my_nums, win_nums, bonus):
     else:
         return "낙첨"
 
-def update_prediction_rank(pred_id, rank):
-    """Updates the rank of a prediction in the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE my_predictions SET rank_val = %s WHERE id = %s', (rank, pred_id))
-    conn.commit()
-    conn.close()
+def grade_predictions(pred_masks, win_nums, bonus):
+    """Vectorized calculate_rank over a uint64 array of prediction bitmasks.
+
+    Returns (matched_count, bonus_matched, rank labels) arrays of length m.
+    """
+    pred_masks = np.asarray(pred_masks, dtype=np.uint64)
+    matched = match_counts(pred_masks, to_mask(win_nums)).astype(np.int64)
+    bonus_matched = (pred_masks >> np.uint64(bonus - 1)) & np.uint64(1) == 1
+    rank_code = np.select(
+        [matched == 6, (matched == 5) & bonus_matched, matched == 5, matched == 4, matched == 3],
+        [5, 4, 3, 2, 1],
+        default=0
+    )
+    return matched, bonus_matched, RANK_LABELS[rank_code]
+
+def update_prediction_ranks(cursor, ids, ranks, matched, bonus_matched):
+    """Writes graded results back, one UPDATE per distinct outcome (chunked by id)."""
+    groups = {}
+    for pred_id, rank, m, b in zip(ids, ranks, matched, bonus_matched):
+        groups.setdefault((str(rank), int(m), bool(b)), []).append(int(pred_id))
+
+    for (rank, m, b), group_ids in groups.items():
+        for start in range(0, len(group_ids), UPDATE_CHUNK_SIZE):
+            chunk = group_ids[start:start + UPDATE_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'UPDATE my_predictions SET rank_val = %s, matched_count = %s, bonus_matched = %s WHERE id IN ({placeholders})',
+                [rank, m, b] + chunk
+            )
 
 def run_auditor(round_no=None):
     """Main function to run the auditor agent."""
-    pending = get_pending_predictions()
+    pending = get_pending_predictions(round_no)
     
     if round_no:
-        pending = [p for p in pending if p['round_no'] == round_no]
         print(f"Checking predictions for round {round_no}...")
     else:
         print(f"Found {len(pending)} pending predictions.")
-    
-    results_summary = []
-    
+
+    by_round = {}
     for pred in pending:
-        pred_id = pred['id']
-        r_no = pred['round_no']
-        my_nums = {pred['num1'], pred['num2'], pred['num3'], pred['num4'], pred['num5'], pred['num6']}
-        
-        win_nums, bonus = get_win_numbers(r_no)
-        
-        if win_nums:
-            rank = calculate_rank(my_nums, win_nums, bonus)
-            update_prediction_rank(pred_id, rank)
-            print(f"Prediction {pred_id} for round {r_no}: {rank}")
-            
-            if rank != "낙첨": # 당첨된 경우만 알림? 아니면 전체? 사용자는 "당첨 확인 시"라고 했음. 낙첨도 결과이긴 함.
-                # 하지만 보통 당첨된 것만 기뻐서 알리고 싶을 듯. 또는 전체 요약.
-                # "예측 번호 생성 시 또는 당첨 확인 시" -> 당첨 확인 결과 전체를 알려주는 게 좋을 듯.
-                # 하지만 너무 많으면 문제. 
-                # 일단 상위 당첨(1~5등)만 리스트업하고, 총 낙첨 수 요약하는 방식이 좋겠음.
-                results_summary.append(f"{r_no}회차 ({rank})")
-                
-        else:
-            print(f"Round {r_no} results not yet available.")
+        by_round.setdefault(pred['round_no'], []).append(pred)
+
+    # One history lookup for every round that has pending predictions
+    win_map = get_win_numbers_bulk(sorted(by_round))
+
+    unique_results = {}
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for r_no in sorted(by_round):
+            if r_no not in win_map:
+                print(f"Round {r_no} results not yet available.")
+                continue
+
+            preds = by_round[r_no]
+            ids = [p['id'] for p in preds]
+            pred_masks = masks_from_array([[p[f'num{i}'] for i in range(1, 7)] for p in preds])
+            win_nums, bonus = win_map[r_no]
+
+            matched, bonus_matched, ranks = grade_predictions(pred_masks, win_nums, bonus)
+            update_prediction_ranks(cursor, ids, ranks, matched, bonus_matched)
+            conn.commit()
+
+            rank_counts = Counter(ranks.tolist())
+            print(f"Round {r_no}: graded {len(preds)} predictions {dict(rank_counts)}")
+            for rank, count in rank_counts.items():
+                # 당첨된 경우(1~5등)만 알림 요약에 포함
+                if rank != "낙첨":
+                    unique_results[f"{r_no}회차 ({rank})"] = count
+    finally:
+        conn.close()
             
-    if results_summary:
+    if unique_results:
         # Send notification
         try:
-            # Group by rank or just list?
-            # If too many, trunk.
-            unique_results = {}
-            for res in results_summary:
-                unique_results[res] = unique_results.get(res, 0) + 1
-            
             msg_lines = ["🎰 당첨 확인 완료"]
             for key, count in unique_results.items():
                 msg_lines.append(f"- {key}: {count}건")
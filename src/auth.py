@@ -5,6 +5,8 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from src.database import get_connection
+from src.cache import TTLCache
+from src.workers import BoundedExecutor
 import os
 
 # Configuration
@@ -12,7 +14,28 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-should-be-in-env")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Users resolved from JWTs are cached per worker for a short time.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 1024))
+# Rewritten when an account is deleted so every worker drops its cached users
+USER_CACHE_GENERATION_PATH = 'data/user_cache_generation'
+
+user_cache = TTLCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL)
+_user_cache_stamp = {'stamp': None}
+
+# bcrypt cost factor. Existing hashes with a different cost are rehashed on login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt takes 100-300 ms per call, so hashing/verification runs in its own
+# bounded pool instead of blocking the event loop.
+password_executor = BoundedExecutor(
+    "bcrypt",
+    max_workers=int(os.getenv("PASSWORD_WORKERS", 2)),
+    max_queue=int(os.getenv("PASSWORD_QUEUE_DEPTH", 32)),
+    timeout=float(os.getenv("PASSWORD_TIMEOUT", 10)),
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password, hashed_password):
@@ -39,6 +62,34 @@ def get_user(username: str):
     conn.close()
     return user
 
+def _user_cache_generation():
+    try:
+        return os.stat(USER_CACHE_GENERATION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def get_cached_user(username: str):
+    """get_user() behind the per-worker user cache. Unknown users are not cached."""
+    stamp = _user_cache_generation()
+    if stamp != _user_cache_stamp['stamp']:
+        user_cache.clear()
+        _user_cache_stamp['stamp'] = stamp
+
+    user = user_cache.get(username)
+    if user is None:
+        user = get_user(username)
+        if user is not None:
+            user_cache.set(username, user)
+    return user
+
+def invalidate_user(username: str):
+    """Drops a user from the cache of this and every other worker."""
+    user_cache.delete(username)
+    tmp_path = USER_CACHE_GENERATION_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(username)
+    os.replace(tmp_path, USER_CACHE_GENERATION_PATH)
+
 def create_user(username, password):
     conn = get_connection()
     cursor = conn.cursor()
@@ -58,16 +109,39 @@ def create_user(username, password):
         conn.close()
 
 
+def update_password_hash(user_id, password_hash):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))
+    conn.commit()
+    conn.close()
+
 def authenticate_user(username, password):
     user = get_user(username)
     if not user:
         return False
-    if not verify_password(password, user['password_hash']):
+    valid, new_hash = pwd_context.verify_and_update(password, user['password_hash'])
+    if not valid:
         return False
     if user.get('is_deleted', 0) == 1:
         return False
+    if new_hash:
+        # Hashed with an older BCRYPT_ROUNDS: store it again at the current cost.
+        update_password_hash(user['id'], new_hash)
+        user['password_hash'] = new_hash
     return user
 
+async def authenticate_user_async(username, password):
+    """authenticate_user() on the password executor.
+
+    Raises WorkerPoolSaturated or asyncio.TimeoutError like BoundedExecutor.run.
+    """
+    return await password_executor.run(authenticate_user, username, password)
+
+async def create_user_async(username, password):
+    """create_user() on the password executor."""
+    return await password_executor.run(create_user, username, password)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,7 +156,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     
-    user = get_user(username)
-    if user is None:
+    # The token is already verified; identity comes from the cache, not the DB.
+    user = get_cached_user(username)
+    if user is None or user.get('is_deleted', 0) == 1:
         raise credentials_exception
     return user
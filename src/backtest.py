@@ -0,0 +1,426 @@
+import os
+import json
+import math
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+
+from src.analyst import (
+    SEQUENCE_LENGTH, EPOCHS_UPDATE, create_model, configure_training_threads,
+    make_training_datasets, make_window_dataset,
+)
+from src.auditor import RANK_LABELS, grade_predictions
+from src.bitmask import from_mask, masks_from_array
+from src.sampler import sample_unique
+
+# Walk-forward backtest: every round is predicted only from the draws before
+# it, K sets are sampled from the strategy's probability vector and graded
+# with the auditor's rules against the real result and prize amounts.
+#   python main.py backtest --strategies lstm frequency uniform --sets 5
+BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', 0))    # 0 = one per CPU
+BACKTEST_CACHE_DIR = os.getenv('BACKTEST_CACHE_DIR', 'data/backtest_cache')
+BACKTEST_EPOCHS = int(os.getenv('BACKTEST_EPOCHS', 20))
+BACKTEST_RETRAIN_EVERY = int(os.getenv('BACKTEST_RETRAIN_EVERY', 50))
+BACKTEST_MIN_HISTORY = 100   # rounds of history before the first predicted round
+# Below this many sets per strategy, grading in-process beats starting a pool
+PARALLEL_MIN_SETS = 50000
+TICKET_PRICE = 1000
+
+# 4th and 5th prizes are fixed amounts; used when the prizes table has no row
+FIXED_PRIZES = {4: 50000, 5: 5000}
+N_COMBOS = math.comb(45, 6)
+# Chance that one uniformly random ticket wins rank 1..5
+UNIFORM_RANK_PROBS = {1: 1 / N_COMBOS, 2: 6 / N_COMBOS, 3: 228 / N_COMBOS,
+                      4: 11115 / N_COMBOS, 5: 182780 / N_COMBOS}
+
+
+def load_backtest_data():
+    """Returns rounds, winning numbers, bonus and prize amounts from the database.
+
+    prizes is an (n, 6) array where prizes[i, r] is the rank-r amount of the
+    i-th round (column 0 unused), falling back to FIXED_PRIZES for 4th/5th.
+    """
+    from src.database import get_connection
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT round_no, num1, num2, num3, num4, num5, num6, bonus FROM history ORDER BY round_no ASC')
+    rows = cursor.fetchall()
+    cursor.execute('SELECT round_no, rank_no, win_amount FROM prizes')
+    prize_rows = cursor.fetchall()
+    conn.close()
+
+    rounds = np.array([row['round_no'] for row in rows], dtype=np.int64)
+    nums = np.array([[row[f'num{i}'] for i in range(1, 7)] for row in rows], dtype=np.int64).reshape(-1, 6)
+    bonus = np.array([row['bonus'] for row in rows], dtype=np.int64)
+
+    position = {int(r): i for i, r in enumerate(rounds)}
+    prizes = np.full((len(rounds), 6), np.nan)
+    for row in prize_rows:
+        i = position.get(row['round_no'])
+        if i is not None and 1 <= row['rank_no'] <= 5 and row['win_amount'] is not None:
+            prizes[i, row['rank_no']] = row['win_amount']
+    return make_backtest_data(rounds, nums, bonus, prizes)
+
+
+def make_backtest_data(rounds, nums, bonus, prizes=None):
+    """Bundles history arrays for run_backtest; missing prizes become fixed/zero amounts."""
+    rounds = np.asarray(rounds, dtype=np.int64)
+    nums = np.asarray(nums, dtype=np.int64)
+    encoded = np.zeros((len(rounds), 45), dtype=np.uint8)
+    encoded[np.arange(len(rounds))[:, None], nums - 1] = 1
+
+    prizes = np.full((len(rounds), 6), np.nan) if prizes is None else np.array(prizes, dtype='float64')
+    missing = int(np.isnan(prizes[:, 1:4]).sum())
+    for rank_no, amount in FIXED_PRIZES.items():
+        prizes[np.isnan(prizes[:, rank_no]), rank_no] = amount
+    prizes = np.nan_to_num(prizes)
+
+    return {
+        'rounds': rounds,
+        'encoded': encoded,
+        'masks': masks_from_array(nums),
+        'bonus': np.asarray(bonus, dtype=np.int64),
+        'prizes': prizes,
+        'missing_prizes': missing,
+    }
+
+
+def prefix_digests(encoded):
+    """digests[i] identifies draws[:i]; a cached vector for round i is valid while it matches."""
+    digests = []
+    h = hashlib.sha1()
+    for row in encoded:
+        digests.append(h.hexdigest()[:16])
+        h.update(np.packbits(row).tobytes())
+    return digests
+
+
+class UniformStrategy:
+    """Every number equally likely: the random baseline."""
+
+    name = 'uniform'
+
+    def cache_key(self, start):
+        return None
+
+    def probabilities(self, encoded, indices, start, workers):
+        return indices, np.full((len(indices), 45), 1 / 45)
+
+
+class FrequencyStrategy:
+    """Numbers weighted by how often they were drawn before the round (+1 smoothing)."""
+
+    name = 'frequency'
+
+    def __init__(self, window=None):
+        self.window = window
+
+    def cache_key(self, start):
+        return None
+
+    def probabilities(self, encoded, indices, start, workers):
+        cumulative = np.vstack([np.zeros((1, 45)), np.cumsum(encoded, axis=0, dtype=np.float64)])
+        indices = np.asarray(indices)
+        counts = cumulative[indices]
+        if self.window:
+            counts = counts - cumulative[np.maximum(indices - self.window, 0)]
+        counts += 1
+        return indices.tolist(), counts / counts.sum(axis=1, keepdims=True)
+
+
+def _fit(model, encoded, epochs):
+    train_ds, val_ds, n_train, _ = make_training_datasets(encoded)
+    if n_train == 0:
+        return
+    import tensorflow as tf
+    callbacks = []
+    if val_ds is not None:
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=3, restore_best_weights=True
+        ))
+    model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks, shuffle=False, verbose=0)
+
+
+def _predict(model, encoded, indices):
+    windows = np.stack([encoded[i - SEQUENCE_LENGTH:i] for i in indices]).astype('float32')
+    return np.asarray(model(windows, training=False), dtype='float64')
+
+
+def _train_and_predict(args):
+    """Pool task: fresh model on draws[:block_start], probabilities for the block's rounds."""
+    encoded, block_start, indices, epochs, seed, threads = args
+    import tensorflow as tf
+    configure_training_threads(threads)
+    tf.keras.utils.set_random_seed(seed + block_start)
+    model = create_model((SEQUENCE_LENGTH, 45))
+    _fit(model, encoded[:block_start], epochs)
+    return _predict(model, encoded, indices)
+
+
+class LSTMStrategy:
+    """The analyst's LSTM, trained only on draws before each predicted block of rounds.
+
+    mode='retrain' trains a fresh model every retrain_every rounds; blocks are
+    independent and run in parallel. mode='incremental' trains once, then
+    fine-tunes the same model on each new block's draws for EPOCHS_UPDATE
+    epochs, like the weekly `main.py train` does.
+    """
+
+    name = 'lstm'
+
+    def __init__(self, mode='incremental', retrain_every=BACKTEST_RETRAIN_EVERY,
+                 epochs=BACKTEST_EPOCHS, seed=0):
+        if mode not in ('retrain', 'incremental'):
+            raise ValueError(f"unknown LSTM backtest mode {mode!r}")
+        self.mode = mode
+        self.retrain_every = max(1, retrain_every)
+        self.epochs = epochs
+        self.seed = seed
+
+    def cache_key(self, start):
+        return (f"lstm-{self.mode}-seq{SEQUENCE_LENGTH}-e{self.epochs}-every{self.retrain_every}"
+                f"-start{start}-seed{self.seed}")
+
+    def _blocks(self, indices, start):
+        blocks = {}
+        for i in indices:
+            block_start = start + (i - start) // self.retrain_every * self.retrain_every
+            blocks.setdefault(block_start, []).append(i)
+        return blocks
+
+    def probabilities(self, encoded, indices, start, workers):
+        if self.mode == 'incremental':
+            # Later blocks depend on the model state left by earlier ones
+            indices = list(range(start, max(indices) + 1))
+            return indices, self._incremental(encoded, indices, start)
+
+        blocks = self._blocks(indices, start)
+        threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+        tasks = [(encoded, b, idx, self.epochs, self.seed, threads) for b, idx in sorted(blocks.items())]
+        print(f"Training {len(tasks)} LSTM models on {workers} worker(s)...")
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                results = list(pool.map(_train_and_predict, tasks))
+        else:
+            results = [_train_and_predict(task) for task in tasks]
+        ordered = [i for _, idx in sorted(blocks.items()) for i in idx]
+        return ordered, np.concatenate(results)
+
+    def _incremental(self, encoded, indices, start):
+        import tensorflow as tf
+        configure_training_threads()
+        tf.keras.utils.set_random_seed(self.seed + start)
+        model = create_model((SEQUENCE_LENGTH, 45))
+        blocks = self._blocks(indices, start)
+        print(f"Training LSTM on {start} rounds, then fine-tuning over {len(blocks)} blocks...")
+
+        probs = []
+        previous = None
+        for block_start, block in sorted(blocks.items()):
+            if previous is None:
+                _fit(model, encoded[:block_start], self.epochs)
+            else:
+                # Windows whose target is one of the draws revealed since the last block
+                new_windows = make_window_dataset(
+                    encoded[:block_start], max(previous - SEQUENCE_LENGTH, 0),
+                    block_start - SEQUENCE_LENGTH, shuffle=True
+                )
+                model.fit(new_windows, epochs=EPOCHS_UPDATE, shuffle=False, verbose=0)
+            probs.append(_predict(model, encoded, block))
+            previous = block_start
+        return np.concatenate(probs)
+
+
+# A strategy has a name, cache_key(start) (None = never cached) and
+# probabilities(encoded, indices, start, workers) -> (indices, (m, 45) vectors),
+# where the vector for round index i may only use encoded[:i]. It may return
+# more rounds than asked for (incremental training recomputes from start).
+STRATEGIES = {
+    'lstm': LSTMStrategy,
+    'frequency': FrequencyStrategy,
+    'uniform': UniformStrategy,
+}
+
+
+def cached_probabilities(strategy, encoded, indices, start, workers, use_cache=True, cache_dir=None):
+    """Probability vectors for rounds `indices`, reusing cached ones whose history is unchanged."""
+    indices = list(indices)
+    cache_dir = cache_dir or BACKTEST_CACHE_DIR
+    key = strategy.cache_key(start) if use_cache else None
+    if key is None:
+        computed = dict(zip(*strategy.probabilities(encoded, indices, start, workers)))
+        return np.stack([computed[i] for i in indices])
+
+    digests = prefix_digests(encoded)
+    path = os.path.join(cache_dir, f'{key}.npz')
+    cached = {}
+    if os.path.exists(path):
+        with np.load(path) as data:
+            for i, digest, probs in zip(data['indices'], data['digests'], data['probs']):
+                if i < len(digests) and digests[i] == str(digest):
+                    cached[int(i)] = probs
+
+    missing = [i for i in indices if i not in cached]
+    if missing:
+        print(f"{strategy.name}: {len(indices) - len(missing)} cached, computing {len(missing)} rounds")
+        computed_indices, probs = strategy.probabilities(encoded, missing, start, workers)
+        cached.update(zip(computed_indices, probs))
+
+        os.makedirs(cache_dir, exist_ok=True)
+        keys = sorted(cached)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, indices=np.array(keys), digests=np.array([digests[i] for i in keys]),
+                 probs=np.stack([cached[i] for i in keys]).astype('float32'))
+        os.replace(tmp_path, path)
+    else:
+        print(f"{strategy.name}: all {len(indices)} rounds cached")
+    return np.stack([cached[i] for i in indices])
+
+
+def _grade_chunk(args):
+    """Pool task: sample and grade K sets for a chunk of rounds.
+
+    Returns per-round (rank counts (m, 6), matched sum, matched sum of squares, prize).
+    """
+    probs, round_nos, win_masks, bonus, prizes, num_sets, seed = args
+    m = len(round_nos)
+    rank_counts = np.zeros((m, 6), dtype=np.int64)
+    matched_sum = np.zeros(m, dtype=np.int64)
+    matched_sq = np.zeros(m, dtype=np.int64)
+    prize = np.zeros(m)
+    for j in range(m):
+        # Seeded by round, so results do not depend on how rounds were split up
+        rng = np.random.default_rng([seed, int(round_nos[j])])
+        sets = sample_unique(probs[j], num_sets, rng=rng)
+        matched, _, labels = grade_predictions(
+            masks_from_array(sets), from_mask(win_masks[j]), int(bonus[j])
+        )
+        codes = np.argmax(labels[:, None] == RANK_LABELS[None, :], axis=1)
+        counts = np.bincount(codes, minlength=6)
+        rank_counts[j] = counts
+        matched_sum[j] = matched.sum()
+        matched_sq[j] = (matched ** 2).sum()
+        # rank code c (1..5) is prize rank 6 - c
+        prize[j] = sum(counts[c] * prizes[j, 6 - c] for c in range(1, 6))
+    return rank_counts, matched_sum, matched_sq, prize
+
+
+def grade_rounds(probs, data, indices, num_sets, seed, workers):
+    """Samples and grades every round, split into one chunk per worker."""
+    indices = np.asarray(indices)
+    if len(indices) * num_sets < PARALLEL_MIN_SETS:
+        workers = 1
+    chunks = np.array_split(np.arange(len(indices)), max(1, min(workers, len(indices))))
+    tasks = [
+        (probs[c], data['rounds'][indices[c]], data['masks'][indices[c]], data['bonus'][indices[c]],
+         data['prizes'][indices[c]], num_sets, seed)
+        for c in chunks if len(c)
+    ]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(len(tasks), mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_grade_chunk, tasks))
+    else:
+        results = [_grade_chunk(task) for task in tasks]
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def uniform_expected_prize(prizes):
+    """Expected prize of one random ticket per round from that round's prize amounts."""
+    return sum(p * prizes[:, rank_no] for rank_no, p in UNIFORM_RANK_PROBS.items())
+
+
+def summarize(name, round_nos, num_sets, rank_counts, matched_sum, matched_sq, prize, prizes):
+    n_sets = len(round_nos) * num_sets
+    wins = rank_counts[:, 1:].sum()
+    hit_rate = wins / n_sets
+    mean_matched = matched_sum.sum() / n_sets
+    var_matched = matched_sq.sum() / n_sets - mean_matched ** 2
+    return {
+        'strategy': name,
+        'rounds': len(round_nos),
+        'sets': int(n_sets),
+        'wins': {label: int(rank_counts[:, code].sum()) for code, label in enumerate(RANK_LABELS) if code},
+        'hit_rate': hit_rate,
+        'hit_rate_stderr': math.sqrt(hit_rate * (1 - hit_rate) / n_sets),
+        'mean_matched': mean_matched,
+        'mean_matched_stderr': math.sqrt(max(var_matched, 0) / n_sets),
+        'prize_total': float(prize.sum()),
+        'prize_per_set': float(prize.sum() / n_sets),
+        'return_rate': float(prize.sum() / (n_sets * TICKET_PRICE)),
+        'uniform_expected_prize_per_set': float(uniform_expected_prize(prizes).mean()),
+        'per_round': [
+            {'round_no': int(r), 'wins': rank_counts[j, :0:-1].tolist(), 'matched': int(matched_sum[j]),
+             'prize': float(prize[j])}
+            for j, r in enumerate(round_nos)
+        ],
+    }
+
+
+def run_backtest(strategies=('lstm', 'frequency', 'uniform'), num_sets=5, start_round=None,
+                 end_round=None, mode='incremental', retrain_every=BACKTEST_RETRAIN_EVERY,
+                 epochs=BACKTEST_EPOCHS, workers=None, seed=0, output=None, use_cache=True,
+                 data=None):
+    """Replays history round by round for each strategy and prints a comparison."""
+    data = data or load_backtest_data()
+    workers = workers or BACKTEST_WORKERS or os.cpu_count() or 1
+    rounds = data['rounds']
+
+    first = max(BACKTEST_MIN_HISTORY, SEQUENCE_LENGTH)
+    if start_round is not None:
+        first = max(first, int(np.searchsorted(rounds, start_round)))
+    last = len(rounds) if end_round is None else int(np.searchsorted(rounds, end_round, side='right'))
+    indices = list(range(first, last))
+    if not indices:
+        print(f"Nothing to backtest: need more than {first} rounds of history.")
+        return None
+    print(f"Backtesting rounds {rounds[indices[0]]}-{rounds[indices[-1]]} "
+          f"({len(indices)} rounds, {num_sets} sets each)")
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'num_sets': num_sets,
+        'seed': seed,
+        'mode': mode,
+        'missing_prizes': data['missing_prizes'],
+        'results': [],
+    }
+    for name in strategies:
+        if name == 'lstm':
+            strategy = LSTMStrategy(mode=mode, retrain_every=retrain_every, epochs=epochs, seed=seed)
+        else:
+            strategy = STRATEGIES[name]()
+        start = time.perf_counter()
+        probs = cached_probabilities(strategy, data['encoded'], indices, first, workers, use_cache)
+        graded = grade_rounds(probs, data, indices, num_sets, seed, workers)
+        result = summarize(name, rounds[indices], num_sets, *graded, data['prizes'][indices])
+        result['seconds'] = round(time.perf_counter() - start, 1)
+        report['results'].append(result)
+
+    print_backtest_report(report)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {output}")
+    return report
+
+
+def print_backtest_report(report):
+    labels = list(RANK_LABELS[:0:-1])  # 1등 ... 5등
+    print(f"{'strategy':<10} {'sets':>7} {'hit rate':>16} {'mean match':>16} "
+          + ' '.join(f'{label:>5}' for label in labels)
+          + f" {'prize/set':>10} {'return':>7} {'seconds':>8}")
+    for r in report['results']:
+        print(f"{r['strategy']:<10} {r['sets']:>7} "
+              f"{r['hit_rate'] * 100:>8.3f}±{r['hit_rate_stderr'] * 100:.3f}% "
+              f"{r['mean_matched']:>9.4f}±{r['mean_matched_stderr']:.4f} "
+              + ' '.join(f"{r['wins'][label]:>5}" for label in labels)
+              + f" {r['prize_per_set']:>10.1f} {r['return_rate'] * 100:>6.1f}% {r['seconds']:>8.1f}")
+    if report['results']:
+        baseline = report['results'][0]['uniform_expected_prize_per_set']
+        print(f"Expected prize of a random ticket over these rounds: {baseline:.1f} "
+              f"(mean match 0.8000, hit rate {sum(UNIFORM_RANK_PROBS.values()) * 100:.3f}%)")
+    if report['missing_prizes']:
+        print(f"Note: {report['missing_prizes']} 1st-3rd prize amounts missing from the prizes table (counted as 0)")
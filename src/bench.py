@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+import src.analyst as analyst
+from src.analyst import (
+    SEQUENCE_LENGTH, LottoPredictor, encode_draws, prepare_windows,
+    create_model, make_training_datasets, generate_numbers_ml,
+)
+from src.sampler import sample_combinations, sample_unique
+
+# Benchmarks for the analyst pipeline on synthetic history (no DB needed).
+# Results are written as JSON so runs on different commits can be compared:
+#   python main.py bench --rounds 1200 10000 --output before.json
+#   python main.py bench --rounds 1200 10000 --compare before.json
+
+
+def synthetic_history(n_rounds, seed=0):
+    """Returns n_rounds random draws shaped like history rows (num1..num6 dicts)."""
+    rng = np.random.default_rng(seed)
+    nums = np.sort(np.argsort(rng.random((n_rounds, 45)), axis=1)[:, :6] + 1, axis=1)
+    return [{f'num{i + 1}': int(v) for i, v in enumerate(row)} for row in nums]
+
+
+def timed(fn, repeats=5, warmup=1):
+    """Median wall time of fn() in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def bench_rounds(n_rounds, repeats=5, batch_sizes=(1, 64), sample_sizes=(5, 1000, 10000)):
+    """Times every stage of the pipeline for one history size. Returns {metric: seconds}."""
+    rows = synthetic_history(n_rounds)
+    results = {}
+
+    results['encode_draws'] = timed(lambda: encode_draws(rows), repeats)
+    encoded = encode_draws(rows)
+    results['prepare_windows'] = timed(lambda: prepare_windows(encoded, SEQUENCE_LENGTH), repeats)
+
+    # One training epoch on a fresh model, including building the tf.data pipeline
+    model = create_model((SEQUENCE_LENGTH, 45))
+    start = time.perf_counter()
+    train_ds, val_ds, _, _ = make_training_datasets(encoded)
+    model.fit(train_ds, validation_data=val_ds, epochs=1, shuffle=False, verbose=0)
+    results['train_one_epoch'] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'bench_model.keras')
+        model.save(model_path)
+
+        predictor = LottoPredictor(model_path)
+        start = time.perf_counter()
+        predictor.get_model()
+        results['model_load'] = time.perf_counter() - start
+
+        window = encoded[-SEQUENCE_LENGTH:]
+        results['predict_single'] = timed(lambda: predictor.predict_probs(window), repeats)
+
+        X, _ = prepare_windows(encoded, SEQUENCE_LENGTH)
+        for batch_size in batch_sizes:
+            batch = np.ascontiguousarray(X[-batch_size:])
+            results[f'predict_batch_{batch_size}'] = timed(
+                lambda: predictor.model(batch, training=False), repeats
+            )
+
+        probs = predictor.predict_probs(window)
+        for num_sets in sample_sizes:
+            results[f'sample_{num_sets}_sets'] = timed(lambda: sample_combinations(probs, num_sets), repeats)
+            results[f'sample_unique_{num_sets}_sets'] = timed(lambda: sample_unique(probs, num_sets), repeats)
+
+        # Full entry point: forward pass + sampling of 5 sets, with the bench model
+        original, analyst._predictor = analyst._predictor, predictor
+        try:
+            results['generate_numbers_ml'] = timed(lambda: generate_numbers_ml(encoded), repeats)
+        finally:
+            analyst._predictor = original
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(rounds=(1200,), repeats=5, output=None, compare=None):
+    """Runs bench_rounds for each history size, prints a table and optionally writes JSON."""
+    import tensorflow as tf
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'tensorflow': tf.__version__,
+        'cpu_count': os.cpu_count(),
+        'repeats': repeats,
+        'results': {},
+    }
+    for n_rounds in rounds:
+        print(f"Benchmarking {n_rounds} rounds...")
+        report['results'][str(n_rounds)] = bench_rounds(n_rounds, repeats)
+    report['peak_rss_mb'] = round(peak_rss_mb(), 1)
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {output}")
+    return report
+
+
+def print_report(report, baseline=None):
+    header = f"{'rounds':>8} {'metric':<24} {'ms':>10}"
+    if baseline:
+        header += f" {'baseline ms':>12} {'ratio':>7}"
+    print(header)
+    for n_rounds, metrics in report['results'].items():
+        base_metrics = (baseline or {}).get('results', {}).get(n_rounds, {})
+        for metric, seconds in metrics.items():
+            line = f"{n_rounds:>8} {metric:<24} {seconds * 1000:>10.2f}"
+            if baseline and metric in base_metrics:
+                base = base_metrics[metric]
+                line += f" {base * 1000:>12.2f} {seconds / base if base else float('nan'):>6.2f}x"
+            print(line)
+    print(f"peak RSS: {report['peak_rss_mb']} MB")
+    if baseline:
+        print(f"baseline: commit {baseline.get('commit')} ({baseline.get('timestamp')}), "
+              f"peak RSS {baseline.get('peak_rss_mb')} MB")
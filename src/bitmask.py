@@ -0,0 +1,63 @@
+import numpy as np
+
+# A 6-of-45 combination as a 64-bit integer: number n sets bit (n - 1).
+# Matching two combinations is then popcount(a & b).
+
+NUM_COLUMNS = ['num1', 'num2', 'num3', 'num4', 'num5', 'num6']
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+_BITS = np.uint64(1) << np.arange(45, dtype=np.uint64)
+
+
+def to_mask(nums):
+    """Returns the bitmask of an iterable of numbers (1-45)."""
+    mask = 0
+    for n in nums:
+        mask |= 1 << (int(n) - 1)
+    return mask
+
+
+def from_mask(mask):
+    """Returns the sorted numbers set in a bitmask."""
+    mask = int(mask)
+    return [n + 1 for n in range(45) if mask >> n & 1]
+
+
+def row_to_mask(row):
+    """Returns the bitmask of a history/my_predictions row dict (num1..num6)."""
+    return to_mask(row[col] for col in NUM_COLUMNS)
+
+
+def mask_to_row(mask):
+    """Returns {'num1': .., ..., 'num6': ..} for a bitmask of six numbers."""
+    return dict(zip(NUM_COLUMNS, from_mask(mask)))
+
+
+def masks_from_array(nums):
+    """Vectorized to_mask over an (m, k) array of numbers. Returns uint64 (m,)."""
+    nums = np.asarray(nums, dtype=np.int64)
+    return np.bitwise_or.reduce(_BITS[nums - 1], axis=-1)
+
+
+def masks_to_multi_hot(masks):
+    """Expands uint64 masks (m,) into an (m, 45) uint8 multi-hot array."""
+    masks = np.asarray(masks, dtype=np.uint64)
+    return ((masks[..., None] & _BITS) != 0).astype(np.uint8)
+
+
+def popcount(masks):
+    """Number of set bits per element of a uint64 array."""
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(masks)
+    return _POPCOUNT_TABLE[masks.view(np.uint8)].reshape(*masks.shape, 8).sum(axis=-1)
+
+
+def match_counts(masks, win_mask):
+    """How many numbers each mask shares with win_mask."""
+    return popcount(np.asarray(masks, dtype=np.uint64) & np.uint64(win_mask))
+
+
+def number_counts(masks):
+    """How often each number 1-45 appears across masks. Returns an int (45,) array."""
+    return masks_to_multi_hot(masks).sum(axis=0, dtype=np.int64)
@@ -0,0 +1,238 @@
+import os
+import re
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from starlette.requests import Request
+
+# Backend for cached pages and query results: 'memory' (per worker process)
+# or 'sqlite' (one file shared by all gunicorn workers).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_TTL = float(os.getenv('CACHE_TTL', 600))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'data/cache.sqlite3')
+
+# Rewritten by the collector after it commits; its mtime is part of every key,
+# so all workers stop using entries built from older data at once.
+CACHE_GENERATION_PATH = 'data/cache_generation'
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ttl seconds."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Cache stored in a local SQLite file, shared by every process on the host.
+
+    Values are pickled. Expired rows are skipped on read and pruned, together
+    with the oldest rows beyond max_entries, every PRUNE_EVERY writes.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path=CACHE_SQLITE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)'
+        )
+
+    def _conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        row = self._conn().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return default
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at)
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        conn = self._conn()
+        conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+        conn.execute('''
+            DELETE FROM cache WHERE key NOT IN (
+                SELECT key FROM cache ORDER BY expires_at DESC LIMIT ?
+            )
+        ''', (self.max_entries,))
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache')
+
+
+def cache_generation():
+    """Returns the current data generation (mtime of the marker file, 0 if absent)."""
+    try:
+        return os.stat(CACHE_GENERATION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def cache_key(*parts):
+    """Builds a key scoped to the current data generation."""
+    return ':'.join(str(p) for p in (cache_generation(),) + parts)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Returns the cache for pages and shared query results, per CACHE_BACKEND."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                if CACHE_BACKEND == 'sqlite':
+                    _response_cache = SQLiteCache()
+                else:
+                    _response_cache = TTLCache()
+    return _response_cache
+
+
+def invalidate_response_cache():
+    """Drops every cached page and query result in all worker processes.
+
+    Called by the collector after it commits new data.
+    """
+    tmp_path = CACHE_GENERATION_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(time.time()))
+    os.replace(tmp_path, CACHE_GENERATION_PATH)
+    if CACHE_BACKEND == 'sqlite':
+        get_response_cache().clear()
+
+
+def get_or_set(key, compute, ttl=None):
+    """Returns the cached value for key, computing and storing it on a miss.
+
+    None results (e.g. a round that does not exist) are not cached.
+    """
+    cache = get_response_cache()
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, ttl)
+    return value
+
+
+class ResponseCacheMiddleware:
+    """Serves GET responses for anonymous visitors from the response cache.
+
+    Only requests without the auth cookie whose path matches one of `paths`
+    (regular expressions) are cached, keyed by path, query string and
+    version(), e.g. the latest round. Only complete 200 responses are stored.
+    """
+
+    def __init__(self, app, paths, version, cookie_name='access_token', ttl=None):
+        self.app = app
+        self.paths = [re.compile(p) for p in paths]
+        self.version = version
+        self.cookie_name = cookie_name
+        self.ttl = ttl
+
+    def _key(self, scope):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None
+        if not any(p.fullmatch(scope['path']) for p in self.paths):
+            return None
+        if self.cookie_name in Request(scope).cookies:
+            return None
+        query = scope.get('query_string', b'').decode('latin-1')
+        return cache_key('page', scope['path'], query, self.version())
+
+    async def __call__(self, scope, receive, send):
+        key = self._key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        cache = get_response_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            headers, body = cached
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        started = {}
+        chunks = []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                started.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False) and started.get('status') == 200:
+                    headers = [(k, v) for k, v in started.get('headers', []) if k.lower() != b'set-cookie']
+                    cache.set(key, (headers, b''.join(chunks)), self.ttl)
+            await send(message)
+
+        await self.app(scope, receive, capture)
@@ -1,7 +1,48 @@
 import requests
 from bs4 import BeautifulSoup
 import sqlite3
-from src.database import get_connection
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from src.database import get_connection, publish_latest_round
+from src.history_store import append_draw
+from src.bitmask import to_mask
+from src.visualizer import rebuild_analytics_snapshot
+from src.combo_index import build_combo_index
+from src.cache import invalidate_response_cache
+
+DHLOTTERY_BASE_URL = os.getenv('DHLOTTERY_BASE_URL', 'https://dhlottery.co.kr')
+
+# Backfill tuning: parallel fetches, requests per second, retries per round
+COLLECTOR_CONCURRENCY = int(os.getenv('COLLECTOR_CONCURRENCY', 4))
+COLLECTOR_RATE = float(os.getenv('COLLECTOR_RATE', 2.0))
+COLLECTOR_RETRIES = int(os.getenv('COLLECTOR_RETRIES', 3))
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second, bursting up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
 
 def get_last_round():
     """Retrieves the last recorded round number from the database."""
@@ -13,168 +54,248 @@ def get_last_round():
     # result is a dict like {'max_round': 1200} or {'max_round': None}
     return result['max_round'] if result and result['max_round'] else 0
 
-def fetch_lotto_data(round_no):
-    """Fetches lottery data for a specific round from the website."""
-    url = f"https://dhlottery.co.kr/gameResult.do?method=byWin&drwNo={round_no}"
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Check if the round exists (basic check based on title or content)
-        # Note: This is a simplified check. Real implementation might need more robust validation.
-        title = soup.find('title').text
-        if "회차별 당첨번호" not in title:
-             return None
-
-        # Extract numbers
-        # The structure might change, but typically it's in a specific div
-        # Example structure (needs verification with actual HTML if possible, but using standard assumption)
-        win_result = soup.find('div', class_='win_result')
-        if not win_result:
-            return None
-            
-        nums = []
-        # Main numbers
-        for span in win_result.find('div', class_='num win').find_all('span'):
-            nums.append(int(span.text))
-        
-        # Bonus number
-        bonus = int(win_result.find('div', class_='num bonus').find('span').text)
-        
-        # Date
-        date_str = soup.find('p', class_='desc').text.replace('추첨', '').strip() # (2023년 01월 01일)
-        
-        # Parse Prize Data (New)
-        prizes = []
-        meta = {'auto': 0, 'manual': 0, 'semi_auto': 0}
-        
-        # Finding the prize table
-        # Usually checking class 'tbl_data tbl_data_col' or finding caption
-        tables = soup.find_all('table', class_='tbl_data')
-        prize_table = None
-        for t in tables:
-            if "등위별 총 당첨금액" in t.text:
-                prize_table = t
-                break
+def parse_lotto_page(html, round_no):
+    """Parses a round result page. Returns None if the page has no result."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Check if the round exists (basic check based on title or content)
+    # Note: This is a simplified check. Real implementation might need more robust validation.
+    title = soup.find('title').text
+    if "회차별 당첨번호" not in title:
+         return None
+
+    # Extract numbers
+    # The structure might change, but typically it's in a specific div
+    # Example structure (needs verification with actual HTML if possible, but using standard assumption)
+    win_result = soup.find('div', class_='win_result')
+    if not win_result:
+        return None
         
-        if prize_table:
-            tbody = prize_table.find('tbody')
-            rows = tbody.find_all('tr')
-            # Rows: 1st, 2nd, 3rd, 4th, 5th
-            for idx, row in enumerate(rows):
-                rank = idx + 1
-                cols = row.find_all('td')
+    nums = []
+    # Main numbers
+    for span in win_result.find('div', class_='num win').find_all('span'):
+        nums.append(int(span.text))
+    
+    # Bonus number
+    bonus = int(win_result.find('div', class_='num bonus').find('span').text)
+    
+    # Date
+    date_str = soup.find('p', class_='desc').text.replace('추첨', '').strip() # (2023년 01월 01일)
+    
+    # Parse Prize Data (New)
+    prizes = []
+    meta = {'auto': 0, 'manual': 0, 'semi_auto': 0}
+    
+    # Finding the prize table
+    # Usually checking class 'tbl_data tbl_data_col' or finding caption
+    tables = soup.find_all('table', class_='tbl_data')
+    prize_table = None
+    for t in tables:
+        if "등위별 총 당첨금액" in t.text:
+            prize_table = t
+            break
+    
+    if prize_table:
+        tbody = prize_table.find('tbody')
+        rows = tbody.find_all('tr')
+        # Rows: 1st, 2nd, 3rd, 4th, 5th
+        for idx, row in enumerate(rows):
+            rank = idx + 1
+            cols = row.find_all('td')
+            
+            # Column indices change because of rowspan in first row
+            # Row 1 (1st): [Rank, Total, Count, PerPerson, Criteria, Remarks(rowspan)]
+            # Row 2-5: [Rank, Total, Count, PerPerson, Criteria] (Remarks is shared)
+            
+            if rank == 1:
+                # 1st place row
+                # cols[1]: Total, cols[2]: Count, cols[3]: PerPerson
+                total = int(cols[1].text.replace(',', '').replace('원', '').strip())
+                count = int(cols[2].text.replace(',', '').strip())
+                per_person = int(cols[3].text.replace(',', '').replace('원', '').strip())
                 
-                # Column indices change because of rowspan in first row
-                # Row 1 (1st): [Rank, Total, Count, PerPerson, Criteria, Remarks(rowspan)]
-                # Row 2-5: [Rank, Total, Count, PerPerson, Criteria] (Remarks is shared)
+                # Parse Remarks for Auto/Manual
+                # The remark cell is the last one (index 5)
+                remark_cell = cols[5]
+                remark_text = remark_cell.text
                 
-                if rank == 1:
-                    # 1st place row
-                    # cols[1]: Total, cols[2]: Count, cols[3]: PerPerson
-                    total = int(cols[1].text.replace(',', '').replace('원', '').strip())
-                    count = int(cols[2].text.replace(',', '').strip())
-                    per_person = int(cols[3].text.replace(',', '').replace('원', '').strip())
-                    
-                    # Parse Remarks for Auto/Manual
-                    # The remark cell is the last one (index 5)
-                    remark_cell = cols[5]
-                    remark_text = remark_cell.text
-                    
-                    # Example text: "1등자동10수동2" or structured with <br>
-                    # Simple parsing: look for "자동n", "수동n", "반자동n"
-                    # Or use regex
-                    import re
-                    auto_match = re.search(r'자동(\d+)', remark_text)
-                    manual_match = re.search(r'수동(\d+)', remark_text)
-                    semi_match = re.search(r'반자동(\d+)', remark_text)
-                    
-                    meta['auto'] = int(auto_match.group(1)) if auto_match else 0
-                    meta['manual'] = int(manual_match.group(1)) if manual_match else 0
-                    meta['semi_auto'] = int(semi_match.group(1)) if semi_match else 0
-                    
-                else:
-                    # Other rows
-                    total = int(cols[1].text.replace(',', '').replace('원', '').strip())
-                    count = int(cols[2].text.replace(',', '').strip())
-                    per_person = int(cols[3].text.replace(',', '').replace('원', '').strip())
+                # Example text: "1등자동10수동2" or structured with <br>
+                # Simple parsing: look for "자동n", "수동n", "반자동n"
+                # Or use regex
+                import re
+                auto_match = re.search(r'자동(\d+)', remark_text)
+                manual_match = re.search(r'수동(\d+)', remark_text)
+                semi_match = re.search(r'반자동(\d+)', remark_text)
                 
-                prizes.append({
-                    'rank': rank,
-                    'total': total,
-                    'count': count,
-                    'per_person': per_person
-                })
-
-        return {
-            'round_no': round_no,
-            'nums': nums,
-            'bonus': bonus,
-            'date': date_str,
-            'prizes': prizes,
-            'meta': meta
-        }
+                meta['auto'] = int(auto_match.group(1)) if auto_match else 0
+                meta['manual'] = int(manual_match.group(1)) if manual_match else 0
+                meta['semi_auto'] = int(semi_match.group(1)) if semi_match else 0
+                
+            else:
+                # Other rows
+                total = int(cols[1].text.replace(',', '').replace('원', '').strip())
+                count = int(cols[2].text.replace(',', '').strip())
+                per_person = int(cols[3].text.replace(',', '').replace('원', '').strip())
+            
+            prizes.append({
+                'rank': rank,
+                'total': total,
+                'count': count,
+                'per_person': per_person
+            })
+
+    return {
+        'round_no': round_no,
+        'nums': nums,
+        'bonus': bonus,
+        'date': date_str,
+        'prizes': prizes,
+        'meta': meta
+    }
+
+def fetch_lotto_data(round_no, session=None, rate_limiter=None, retries=0, backoff=1.0):
+    """Fetches lottery data for a specific round from the website.
+
+    Transient failures (connection errors, 429, 5xx) are retried up to
+    `retries` times with exponential backoff and jitter.
+    """
+    url = f"{DHLOTTERY_BASE_URL}/gameResult.do?method=byWin&drwNo={round_no}"
+    http = session or requests
+    for attempt in range(retries + 1):
+        if rate_limiter:
+            rate_limiter.acquire()
+        try:
+            response = http.get(url, timeout=10)
+            response.raise_for_status()
+            break
+        except requests.RequestException as e:
+            status_code = e.response.status_code if e.response is not None else None
+            retryable = status_code is None or status_code == 429 or status_code >= 500
+            if not retryable or attempt == retries:
+                print(f"Error fetching round {round_no}: {e}")
+                return None
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+            print(f"Error fetching round {round_no}: {e} (retrying in {delay:.1f}s)")
+            time.sleep(delay)
 
+    try:
+        return parse_lotto_page(response.text, round_no)
     except Exception as e:
         print(f"Error fetching round {round_no}: {e}")
         return None
 
-def save_to_db(data):
-    """Saves the fetched data to the database."""
+HISTORY_UPSERT_SQL = '''
+    INSERT IGNORE INTO history (
+        round_no, num1, num2, num3, num4, num5, num6, bonus, draw_date, 
+        first_prize_auto, first_prize_manual, first_prize_semi_auto, combo_mask
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        combo_mask = VALUES(combo_mask),
+        first_prize_auto = VALUES(first_prize_auto),
+        first_prize_manual = VALUES(first_prize_manual),
+        first_prize_semi_auto = VALUES(first_prize_semi_auto)
+'''
+
+PRIZES_UPSERT_SQL = '''
+    INSERT INTO prizes (round_no, rank_no, total_price, winner_count, win_amount)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_price = VALUES(total_price),
+        winner_count = VALUES(winner_count),
+        win_amount = VALUES(win_amount)
+'''
+
+STORE_INSERT_SQL = '''
+    INSERT INTO winning_stores (round_no, store_name, choice_type, address)
+    VALUES (%s, %s, %s, %s)
+'''
+
+# Number of rounds / store rows written per transaction
+COLLECTOR_BATCH_SIZE = int(os.getenv('COLLECTOR_BATCH_SIZE', 50))
+
+class BatchWriter:
+    """Buffers items and hands them to flush_fn in batches.
+
+    Use as a context manager so the last partial batch is flushed on exit.
+    add() is only called from one thread (the collector's main loop).
+    """
+
+    def __init__(self, flush_fn, batch_size=COLLECTOR_BATCH_SIZE):
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.items = []
+
+    def add(self, item):
+        self.items.append(item)
+        if len(self.items) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.items:
+            items, self.items = self.items, []
+            self.flush_fn(items)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+def save_rounds_to_db(rounds):
+    """Saves fetched rounds (history + prizes) with multi-row upserts in one transaction."""
+    history_rows = []
+    prize_rows = []
+    for data in rounds:
+        meta = data.get('meta', {})
+        history_rows.append((
+            data['round_no'], *data['nums'][:6], data['bonus'], data['date'],
+            meta.get('auto', 0), meta.get('manual', 0), meta.get('semi_auto', 0),
+            to_mask(data['nums'][:6])
+        ))
+        for p in data.get('prizes', []):
+            prize_rows.append((data['round_no'], p['rank'], p['total'], p['count'], p['per_person']))
+
     conn = get_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute('''
-            INSERT IGNORE INTO history (
-                round_no, num1, num2, num3, num4, num5, num6, bonus, draw_date, 
-                first_prize_auto, first_prize_manual, first_prize_semi_auto
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                first_prize_auto = VALUES(first_prize_auto),
-                first_prize_manual = VALUES(first_prize_manual),
-                first_prize_semi_auto = VALUES(first_prize_semi_auto)
-        ''', (
-            data['round_no'],
-            data['nums'][0],
-            data['nums'][1],
-            data['nums'][2],
-            data['nums'][3],
-            data['nums'][4],
-            data['nums'][5],
-            data['bonus'],
-            data['date'],
-            data.get('meta', {}).get('auto', 0),
-            data.get('meta', {}).get('manual', 0),
-            data.get('meta', {}).get('semi_auto', 0)
-        ))
-        
-        # Save Prizes
-        if 'prizes' in data:
-            for p in data['prizes']:
-                cursor.execute('''
-                    INSERT INTO prizes (round_no, rank_no, total_price, winner_count, win_amount)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        total_price = VALUES(total_price),
-                        winner_count = VALUES(winner_count),
-                        win_amount = VALUES(win_amount)
-                ''', (
-                    data['round_no'],
-                    p['rank'],
-                    p['total'],
-                    p['count'],
-                    p['per_person']
-                ))
-
+        # pymysql turns these into multi-row INSERT ... ON DUPLICATE KEY UPDATE statements
+        cursor.executemany(HISTORY_UPSERT_SQL, history_rows)
+        if prize_rows:
+            cursor.executemany(PRIZES_UPSERT_SQL, prize_rows)
         conn.commit()
-        print(f"Saved round {data['round_no']} (Win Info + Prizes)")
+        error = None
     except Exception as e:
-        print(f"Error saving round {data['round_no']}: {e}")
+        conn.rollback()
+        error = e
     finally:
         conn.close()
 
+    if error is not None:
+        if len(rounds) == 1:
+            print(f"Error saving round {rounds[0]['round_no']}: {error}")
+            return
+        # Isolate the bad round instead of dropping the whole batch.
+        print(f"Error saving batch of {len(rounds)} rounds, retrying one by one: {error}")
+        for data in rounds:
+            save_rounds_to_db([data])
+        return
+
+    round_nos = [data['round_no'] for data in rounds]
+    print(f"Saved {len(rounds)} rounds {min(round_nos)}-{max(round_nos)} (Win Info + Prizes)")
+
+    # Keep the analyst's encoded history in step. It resyncs from the DB on gaps,
+    # so a failure here is not fatal.
+    for data in rounds:
+        try:
+            append_draw(data['round_no'], data['nums'])
+        except Exception as e:
+            print(f"Error updating encoded history for round {data['round_no']}: {e}")
+
+def save_to_db(data):
+    """Saves the fetched data to the database."""
+    save_rounds_to_db([data])
+
 def get_existing_rounds():
     """Retrieves rounds that have both history and prize data recorded."""
     conn = get_connection()
@@ -193,6 +314,39 @@ def get_existing_rounds():
     conn.close()
     return prizes_rounds
 
+def fetch_rounds_concurrently(rounds, save=None, concurrency=COLLECTOR_CONCURRENCY,
+                              rate=COLLECTOR_RATE, retries=COLLECTOR_RETRIES, backoff=1.0):
+    """Fetches rounds in parallel over one keep-alive session and saves each result.
+
+    Requests are spread across `concurrency` threads but throttled together by a
+    token bucket. Saving happens on the calling thread, in completion order.
+    Returns the list of rounds that could not be fetched.
+    """
+    save = save or save_to_db
+    limiter = TokenBucket(rate)
+    failed = []
+
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(fetch_lotto_data, round_no, session, limiter, retries, backoff): round_no
+                for round_no in rounds
+            }
+            for future in as_completed(futures):
+                round_no = futures[future]
+                data = future.result()
+                if data:
+                    save(data)
+                else:
+                    print(f"Failed to fetch round {round_no}")
+                    failed.append(round_no)
+
+    return sorted(failed)
+
 def run_collector(start_round=1, end_round=1200):
     """Main function to run the collector agent."""
     existing_rounds = get_existing_rounds()
@@ -206,16 +360,23 @@ def run_collector(start_round=1, end_round=1200):
         print(f"All rounds {start_round}-{end_round} are present.")
     else:
         print(f"Found {len(missing_rounds)} missing rounds in range {start_round}-{end_round}. Starting fetch...")
-        for round_no in missing_rounds:
-            print(f"Fetching round {round_no}...")
-            # Throttling per request (3~5s)
-            time.sleep(random.uniform(3.0, 5.0))
-            
-            data = fetch_lotto_data(round_no)
-            if data:
-                save_to_db(data)
-            else:
-                print(f"Failed to fetch round {round_no}")
+        # Throttled by a shared token bucket (COLLECTOR_RATE req/s) instead of a fixed sleep,
+        # written COLLECTOR_BATCH_SIZE rounds per transaction
+        with BatchWriter(save_rounds_to_db) as writer:
+            failed = fetch_rounds_concurrently(missing_rounds, save=writer.add)
+
+        if len(failed) < len(missing_rounds):
+            # New rounds landed: tell web workers and refresh the precomputed /analysis data.
+            try:
+                publish_latest_round(get_last_round())
+                invalidate_response_cache()
+                rebuild_analytics_snapshot()
+            except Exception as e:
+                print(f"Error publishing new rounds: {e}")
+            try:
+                build_combo_index()
+            except Exception as e:
+                print(f"Error rebuilding combination index: {e}")
     
     # Check for new rounds beyond end_round if it's the latest
     # For CLI specific range, we might strictly stick to the range.
@@ -225,22 +386,35 @@ def run_collector(start_round=1, end_round=1200):
     # or make it optional. For now, let's remove it to strictly follow "load --from --to".
     pass
 
-def save_store_to_db(round_no, store_name, choice_type, address):
+def save_stores_to_db(rows):
+    """Saves (round_no, store_name, choice_type, address) rows in one transaction."""
     conn = get_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute('''
-            INSERT INTO winning_stores (round_no, store_name, choice_type, address)
-            VALUES (%s, %s, %s, %s)
-        ''', (round_no, store_name, choice_type, address))
+        cursor.executemany(STORE_INSERT_SQL, rows)
         conn.commit()
+        error = None
     except Exception as e:
-        print(f"Error saving store for round {round_no}: {e}")
+        conn.rollback()
+        error = e
     finally:
         conn.close()
 
-import time
-import random
+    if error is not None:
+        if len(rows) == 1:
+            print(f"Error saving store {rows[0][1]!r} for round {rows[0][0]}: {error}")
+            return
+        # The rollback left nothing behind; isolate the bad row instead of dropping the batch.
+        print(f"Error saving {len(rows)} stores for rounds {rows[0][0]}-{rows[-1][0]}, retrying one by one: {error}")
+        for row in rows:
+            save_stores_to_db([row])
+        return
+
+    # History detail pages list the stores
+    invalidate_response_cache()
+
+def save_store_to_db(round_no, store_name, choice_type, address):
+    save_stores_to_db([(round_no, store_name, choice_type, address)])
 
 def collect_winning_stores(start_round, end_round):
     """Collects 1st place winning stores."""
@@ -250,63 +424,65 @@ def collect_winning_stores(start_round, end_round):
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     }
     
-    for round_no in range(start_round, end_round + 1):
-        url = f"https://dhlottery.co.kr/store.do?method=topStore&pageGubun=L645&drwNo={round_no}"
-        try:
-            # Random delay to be polite
-            time.sleep(random.uniform(0.5, 2.0))
+    # One keep-alive session; rows are written COLLECTOR_BATCH_SIZE at a time
+    with requests.Session() as session, BatchWriter(save_stores_to_db) as store_writer:
+        for round_no in range(start_round, end_round + 1):
+            url = f"{DHLOTTERY_BASE_URL}/store.do?method=topStore&pageGubun=L645&drwNo={round_no}"
+            try:
+                # Random delay to be polite
+                time.sleep(random.uniform(0.5, 2.0))
             
-            response = requests.get(url, headers=headers, timeout=10)
-            # encoding might need to be set manually if korean chars are broken, usually utf-8 or euc-kr
-            # dhlottery usually uses euc-kr. let's check content encoding or just try auto.
-            # response.encoding = 'euc-kr' # often needed for korean sites
+                response = session.get(url, headers=headers, timeout=10)
+                # encoding might need to be set manually if korean chars are broken, usually utf-8 or euc-kr
+                # dhlottery usually uses euc-kr. let's check content encoding or just try auto.
+                # response.encoding = 'euc-kr' # often needed for korean sites
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+                soup = BeautifulSoup(response.text, 'html.parser')
             
-            # Find the first group_content (1st place)
-            group_contents = soup.find_all('div', class_='group_content')
-            if not group_contents:
-                print(f"No store data found for round {round_no}")
-                continue
+                # Find the first group_content (1st place)
+                group_contents = soup.find_all('div', class_='group_content')
+                if not group_contents:
+                    print(f"No store data found for round {round_no}")
+                    continue
                 
-            first_place_group = group_contents[0]
+                first_place_group = group_contents[0]
             
-            # Additional check if it's indeed 1st place
-            title = first_place_group.find('h4', class_='title')
-            if not title or "1등 배출점" not in title.text:
-                # Try finding by text if order is not guaranteed, but usually it is.
-                print(f"Warning: Unexpected structure for round {round_no}. Skipping.")
-                continue
-
-            table = first_place_group.find('table', class_='tbl_data')
-            if not table:
-                continue
+                # Additional check if it's indeed 1st place
+                title = first_place_group.find('h4', class_='title')
+                if not title or "1등 배출점" not in title.text:
+                    # Try finding by text if order is not guaranteed, but usually it is.
+                    print(f"Warning: Unexpected structure for round {round_no}. Skipping.")
+                    continue
+
+                table = first_place_group.find('table', class_='tbl_data')
+                if not table:
+                    continue
                 
-            tbody = table.find('tbody')
-            rows = tbody.find_all('tr')
+                tbody = table.find('tbody')
+                rows = tbody.find_all('tr')
             
-            count = 0
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 4:
-                    continue
+                count = 0
+                for row in rows:
+                    cols = row.find_all('td')
+                    if len(cols) < 4:
+                        continue
                 
-                # cols[1]: Name, cols[2]: Type, cols[3]: Address
-                store_name = cols[1].text.strip()
-                choice_type = cols[2].text.strip().replace('\n', '').replace('\r', '').replace('\t', '')
-                address = cols[3].text.strip()
+                    # cols[1]: Name, cols[2]: Type, cols[3]: Address
+                    store_name = cols[1].text.strip()
+                    choice_type = cols[2].text.strip().replace('\n', '').replace('\r', '').replace('\t', '')
+                    address = cols[3].text.strip()
                 
-                # Check for "Empty" row (sometimes happens if no data)
-                if "조회 결과가 없습니다" in store_name:
-                    continue
+                    # Check for "Empty" row (sometimes happens if no data)
+                    if "조회 결과가 없습니다" in store_name:
+                        continue
 
-                save_store_to_db(round_no, store_name, choice_type, address)
-                count += 1
+                    store_writer.add((round_no, store_name, choice_type, address))
+                    count += 1
             
-            print(f"Round {round_no}: Saved {count} stores.")
+                print(f"Round {round_no}: Collected {count} stores.")
             
-        except Exception as e:
-            print(f"Error fetching stores for round {round_no}: {e}")
+            except Exception as e:
+                print(f"Error fetching stores for round {round_no}: {e}")
 
 if __name__ == "__main__":
     run_collector()
@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import itertools
+import threading
+from math import comb
+from datetime import datetime
+
+import numpy as np
+
+# Exact statistics for every one of the C(45, 6) = 8,145,060 combinations.
+#
+# Combinations are numbered by their lexicographic rank (the order of
+# itertools.combinations), so each statistic is a flat .npy column indexed by
+# rank. The columns are memory-mapped read-only, so all web workers share one
+# copy through the page cache and a query is a vectorized pass over a column.
+#
+#   max_match  best match against any past draw (0-6)
+#   hits3      past draws matching 3 or more numbers
+#   hits4      past draws matching 4 or more numbers
+#   sum        sum of the six numbers (21-255)
+#   odd        odd numbers in the set (0-6)
+#   run        longest run of consecutive numbers (1-6)
+COMBO_INDEX_DIR = os.getenv('COMBO_INDEX_DIR', 'data/combo_index')
+COMBO_INDEX_VERSION = 1
+BUILD_CHUNK = 1 << 20
+
+N_NUMBERS = 45
+PICKS = 6
+N_COMBOS = comb(N_NUMBERS, PICKS)
+
+FEATURES = {
+    'max_match': np.uint8,
+    'hits3': np.uint16,
+    'hits4': np.uint16,
+    'sum': np.uint8,
+    'odd': np.uint8,
+    'run': np.uint8,
+}
+
+_BINOM = np.array(
+    [[comb(n, k) for k in range(PICKS + 1)] for n in range(N_NUMBERS + 1)], dtype=np.int64
+)
+_SUBSETS = {k: np.array(list(itertools.combinations(range(PICKS), k))) for k in range(1, PICKS + 1)}
+
+
+def rank_array(combos):
+    """Lexicographic ranks of sorted 0-based combinations, shape (..., 6) -> (...)."""
+    c = np.asarray(combos, dtype=np.int64)
+    return N_COMBOS - 1 - _BINOM[N_NUMBERS - 1 - c, PICKS - np.arange(PICKS)].sum(axis=-1)
+
+
+def rank(nums):
+    """Returns the rank of a combination of six numbers (1-45)."""
+    nums = sorted(int(n) for n in nums)
+    if len(set(nums)) != PICKS or nums[0] < 1 or nums[-1] > N_NUMBERS:
+        raise ValueError(f"need {PICKS} distinct numbers between 1 and {N_NUMBERS}, got {nums}")
+    return int(rank_array(np.array(nums) - 1))
+
+
+def unrank(r):
+    """Returns the sorted numbers (1-45) of the combination with rank r."""
+    r = int(r)
+    nums = []
+    n = 0
+    for i in range(PICKS):
+        # Skip every block of combinations starting with a smaller number
+        while True:
+            block = comb(N_NUMBERS - 1 - n, PICKS - 1 - i)
+            if r < block:
+                break
+            r -= block
+            n += 1
+        nums.append(n + 1)
+        n += 1
+    return nums
+
+
+def iter_combinations(chunk=BUILD_CHUNK):
+    """Yields (start_rank, (m, 6) uint8 array of 0-based combinations) in rank order."""
+    it = itertools.chain.from_iterable(itertools.combinations(range(N_NUMBERS), PICKS))
+    start = 0
+    while start < N_COMBOS:
+        m = min(chunk, N_COMBOS - start)
+        yield start, np.fromiter(it, dtype=np.uint8, count=m * PICKS).reshape(m, PICKS)
+        start += m
+
+
+def _subset_counts(draws, k):
+    """How many draws contain each k-subset of numbers, as a dense 45**k table."""
+    subsets = draws[:, _SUBSETS[k]]
+    flat = (subsets * (N_NUMBERS ** np.arange(k - 1, -1, -1))).sum(axis=-1)
+    return np.bincount(flat.ravel(), minlength=N_NUMBERS ** k)
+
+
+def _subset_sums(columns, table, k):
+    """For each combination, sum of table over its k-subsets.
+
+    columns is the (6, m) transposed chunk, so each number position is contiguous.
+    """
+    total = np.zeros(columns.shape[1], dtype=np.int64)
+    for subset in _SUBSETS[k]:
+        flat = columns[subset[0]].copy()
+        for j in subset[1:]:
+            flat *= N_NUMBERS
+            flat += columns[j]
+        total += table[flat]
+    return total
+
+
+def _near_miss_ranks(draws):
+    """Ranks of every combination matching a draw in exactly five numbers."""
+    all_numbers = np.arange(N_NUMBERS)
+    ranks = []
+    for draw in draws:
+        others = np.setdiff1d(all_numbers, draw)
+        fives = draw[_SUBSETS[5]]                                   # (6, 5)
+        combos = np.concatenate([
+            np.repeat(fives[:, None, :], len(others), axis=1),
+            np.broadcast_to(others[None, :, None], (len(fives), len(others), 1)),
+        ], axis=-1)
+        combos.sort(axis=-1)
+        ranks.append(rank_array(combos).ravel())
+    return np.concatenate(ranks) if ranks else np.zeros(0, dtype=np.int64)
+
+
+def _longest_run(combos):
+    best = np.zeros(len(combos), dtype=np.int64)
+    current = np.zeros(len(combos), dtype=np.int64)
+    for step in np.diff(combos.astype(np.int64), axis=1).T == 1:
+        current = np.where(step, current + 1, 0)
+        np.maximum(best, current, out=best)
+    return best + 1
+
+
+def compute_features(combos, tables):
+    """Statistics for a chunk of 0-based combinations given the draw tables."""
+    columns = np.ascontiguousarray(combos.T, dtype=np.intp)
+    s1, s2, s3, s4 = (_subset_sums(columns, tables[k], k) for k in range(1, 5))
+    ranks = rank_array(combos)
+    e6 = tables[6][ranks].astype(np.int64)
+    e5 = tables[5][ranks].astype(np.int64)
+    # A draw matching m numbers contributes C(m, k) to the k-subset sum s_k,
+    # so the exact-match counts fall out by inclusion-exclusion from the top.
+    e4 = s4 - 5 * e5 - 15 * e6
+    e3 = s3 - 4 * e4 - 10 * e5 - 20 * e6
+
+    max_match = np.select(
+        [e6 > 0, e5 > 0, e4 > 0, e3 > 0, s2 > 0, s1 > 0], [6, 5, 4, 3, 2, 1], default=0
+    )
+    hits4 = e4 + e5 + e6
+    return {
+        'max_match': max_match,
+        'hits3': e3 + hits4,
+        'hits4': hits4,
+        'sum': combos.sum(axis=1, dtype=np.int64) + PICKS,
+        'odd': (combos % 2 == 0).sum(axis=1),  # 0-based even is an odd number
+        'run': _longest_run(combos),
+    }
+
+
+def build_tables(draws):
+    """Per-subset draw counts used by compute_features. draws is (n, 6) 0-based."""
+    draws = np.sort(np.asarray(draws, dtype=np.int64).reshape(-1, PICKS), axis=1)
+    tables = {k: _subset_counts(draws, k) for k in range(1, 5)}
+    tables[5] = np.zeros(N_COMBOS, dtype=np.uint16)
+    np.add.at(tables[5], _near_miss_ranks(draws), 1)
+    tables[6] = np.zeros(N_COMBOS, dtype=np.uint16)
+    np.add.at(tables[6], rank_array(draws), 1)
+    return tables
+
+
+def load_history_draws():
+    """Returns (last_round, (n, 6) 0-based draws) from the encoded history store."""
+    from src.database import get_latest_round
+    from src.history_store import load_encoded_history
+    encoded = np.asarray(load_encoded_history())
+    draws = np.nonzero(encoded)[1].reshape(-1, PICKS)
+    return get_latest_round(), draws
+
+
+def build_combo_index(path=COMBO_INDEX_DIR, draws=None, last_round=None):
+    """Builds every column from the history and swaps the files in.
+
+    Each column is written to a temporary .npy and renamed over the old one,
+    so workers holding a mapping keep reading the previous file. meta.json is
+    written last and its mtime tells readers to reopen.
+    """
+    start = time.perf_counter()
+    if draws is None:
+        last_round, draws = load_history_draws()
+    tables = build_tables(draws)
+
+    os.makedirs(path, exist_ok=True)
+    columns = {
+        name: np.lib.format.open_memmap(
+            os.path.join(path, f'{name}.npy.tmp'), mode='w+', dtype=dtype, shape=(N_COMBOS,)
+        )
+        for name, dtype in FEATURES.items()
+    }
+    for offset, combos in iter_combinations():
+        for name, values in compute_features(combos, tables).items():
+            columns[name][offset:offset + len(combos)] = values
+
+    for column in columns.values():
+        column.flush()
+    columns.clear()
+    for name in FEATURES:
+        os.replace(os.path.join(path, f'{name}.npy.tmp'), os.path.join(path, f'{name}.npy'))
+
+    meta = {
+        'version': COMBO_INDEX_VERSION,
+        'last_round': int(last_round or 0),
+        'draws': int(len(draws)),
+        'combinations': N_COMBOS,
+        'built_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    tmp_path = os.path.join(path, 'meta.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, 'meta.json'))
+    print(f"Combination index built for round {meta['last_round']} "
+          f"({meta['draws']} draws) in {time.perf_counter() - start:.1f}s")
+    return meta
+
+
+class ComboIndex:
+    """Read-only view of the index; every column is memory-mapped."""
+
+    def __init__(self, path=COMBO_INDEX_DIR):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.columns = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in FEATURES
+        }
+
+    def stats(self, r):
+        return {name: int(column[r]) for name, column in self.columns.items()}
+
+    def lookup(self, nums):
+        """Statistics of one combination, e.g. lookup([1, 2, 3, 4, 5, 6])['hits4']."""
+        r = rank(nums)
+        return {'rank': r, 'nums': unrank(r), **self.stats(r)}
+
+    def _score(self, by):
+        if isinstance(by, str):
+            return self.columns[self._feature(by)]
+        # {feature: weight, ...} -> weighted sum of columns
+        score = np.zeros(N_COMBOS, dtype=np.float32)
+        for name, weight in by.items():
+            score += np.float32(weight) * self.columns[self._feature(name)]
+        return score
+
+    def _feature(self, name):
+        if name not in self.columns:
+            raise ValueError(f"unknown feature {name!r}, expected one of {sorted(self.columns)}")
+        return name
+
+    def where(self, **ranges):
+        """Boolean mask of combinations with each feature in an inclusive (low, high) range."""
+        mask = np.ones(N_COMBOS, dtype=bool)
+        for name, (low, high) in ranges.items():
+            column = self.columns[self._feature(name)]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        return mask
+
+    def count(self, **ranges):
+        """Number of combinations matching the ranges, e.g. count(hits4=(1, None))."""
+        return int(np.count_nonzero(self.where(**ranges))) if ranges else N_COMBOS
+
+    def distribution(self, feature):
+        """Histogram of a feature over all combinations: list indexed by value."""
+        return np.bincount(self.columns[self._feature(feature)]).tolist()
+
+    def top(self, by, n=10, largest=True, **ranges):
+        """The n best combinations by a feature (or {feature: weight} score).
+
+        Ties are broken by rank; ranges filter as in where().
+        """
+        score = self._score(by)
+        candidates = np.flatnonzero(self.where(**ranges)) if ranges else None
+        values = np.asarray(score if candidates is None else score[candidates])
+        if largest:
+            values = -values.astype(np.float64)
+        n = min(n, len(values))
+        if n == 0:
+            return []
+        picked = np.argpartition(values, n - 1)[:n] if n < len(values) else np.arange(len(values))
+        ranks = picked if candidates is None else candidates[picked]
+        order = np.lexsort((ranks, values[picked]))
+        return [
+            {'rank': int(r), 'nums': unrank(r), **self.stats(r),
+             **({} if isinstance(by, str) else {'score': float(score[r])})}
+            for r in ranks[order]
+        ]
+
+
+_index_cache = {'stamp': None, 'index': None}
+_index_lock = threading.Lock()
+
+def get_combo_index(path=COMBO_INDEX_DIR):
+    """Returns the shared ComboIndex, reopened when a rebuild lands, or None if not built."""
+    meta_path = os.path.join(path, 'meta.json')
+    try:
+        stamp = os.stat(meta_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _index_lock:
+        if stamp != _index_cache['stamp']:
+            index = ComboIndex(path)
+            if index.meta.get('version') != COMBO_INDEX_VERSION:
+                print("Combination index was built by an older release; run `python main.py combo_index`.")
+                index = None
+            _index_cache['index'] = index
+            _index_cache['stamp'] = stamp
+        return _index_cache['index']
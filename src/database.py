@@ -1,13 +1,27 @@
 import pymysql
 import os
+import time
+import threading
+from collections import deque
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from sqlalchemy import create_engine
 
-def get_connection():
-    """Establishes a connection to the MariaDB database."""
+# Connection pool settings (per worker process)
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))       # reconnect after N seconds
+DB_POOL_PING_INTERVAL = int(os.getenv('DB_POOL_PING_INTERVAL', 30))  # ping if idle longer
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))        # wait for a free connection
+
+# Latest collected round, shared across processes through a marker file
+LATEST_ROUND_MARKER_PATH = 'data/latest_round'
+LATEST_ROUND_TTL = float(os.getenv('LATEST_ROUND_TTL', 60))
+
+def _connect():
+    """Opens a new MariaDB connection."""
     return pymysql.connect(
         host=os.getenv('DB_HOST'),
         user=os.getenv('DB_USER'),
@@ -18,8 +32,159 @@ def get_connection():
         cursorclass=pymysql.cursors.DictCursor
     )
 
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within DB_POOL_TIMEOUT."""
+
+class PooledConnection:
+    """Connection handed out by the pool.
+
+    Behaves like the underlying pymysql connection, except close() returns it
+    to the pool instead of closing the socket.
+    """
+
+    _conn = None
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise pymysql.err.InterfaceError("Connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Safety net for code paths that forget to close.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+class ConnectionPool:
+    """Thread-safe pool of pymysql connections owned by one process."""
+
+    def __init__(self, connect=_connect, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 recycle=DB_POOL_RECYCLE, ping_interval=DB_POOL_PING_INTERVAL, timeout=DB_POOL_TIMEOUT):
+        self.connect = connect
+        self.max_size = max_size
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._size = 0
+        self._cond = threading.Condition()
+
+        for _ in range(min(min_size, max_size)):
+            try:
+                conn = self.connect()
+            except Exception as e:
+                print(f"Could not pre-open pooled connection: {e}")
+                break
+            now = time.monotonic()
+            self._idle.append((conn, now, now))
+            self._size += 1
+
+    def acquire(self):
+        """Checks out a healthy connection, opening one if the pool has room."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                self._cond.wait(remaining)
+            if self._idle:
+                conn, created_at, last_used = self._idle.pop()
+            else:
+                conn = None
+                self._size += 1
+
+        if conn is not None:
+            now = time.monotonic()
+            if now - created_at > self.recycle:
+                self._close_quietly(conn)
+                conn = None
+            elif now - last_used > self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self._close_quietly(conn)
+                    conn = None
+
+        if conn is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                self._discard()
+                raise
+            created_at = time.monotonic()
+        return PooledConnection(self, conn, created_at)
+
+    def release(self, conn, created_at):
+        """Returns a connection, ending any open transaction first."""
+        if os.getpid() != self.pid:
+            return  # Inherited across fork; never reuse another process's socket.
+        try:
+            # Also drops the REPEATABLE READ snapshot so the next user sees fresh data.
+            conn.rollback()
+        except Exception:
+            self._close_quietly(conn)
+            self._discard()
+            return
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns this process's pool, creating a fresh one after a fork (e.g. gunicorn workers)."""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool()
+    return _pool
+
+def get_connection():
+    """Returns a pooled connection to the MariaDB database. close() gives it back to the pool."""
+    return get_pool().acquire()
+
+_engine = None
+_engine_pid = None
+
 def get_engine():
-    """Creates a SQLAlchemy engine for pandas integration."""
+    """Returns this process's SQLAlchemy engine for pandas integration."""
+    global _engine, _engine_pid
+    if _engine is not None and _engine_pid == os.getpid():
+        return _engine
+
     user = os.getenv('DB_USER')
     password = os.getenv('DB_PASSWORD')
     host = os.getenv('DB_HOST')
@@ -28,10 +193,57 @@ def get_engine():
     
     # pymysql is used as the driver
     db_url = f"mysql+pymysql://{user}:{password}@{host}:{port}/{dbname}?charset=utf8mb4"
-    return create_engine(db_url)
+    _engine = create_engine(
+        db_url,
+        pool_size=DB_POOL_MAX_SIZE,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+    _engine_pid = os.getpid()
+    return _engine
+
+_latest_round_cache = {'value': None, 'stamp': None, 'checked_at': 0.0}
+_latest_round_lock = threading.Lock()
+
+def _marker_stamp():
+    try:
+        return os.stat(LATEST_ROUND_MARKER_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def get_latest_round():
+    """Returns MAX(round_no) of history, cached per process.
 
-def init_db():
-    """Initializes the database tables."""
+    The collector rewrites the marker file after ingesting a round, which
+    invalidates every worker's cache at once; otherwise the value is re-read
+    at most every LATEST_ROUND_TTL seconds.
+    """
+    stamp = _marker_stamp()
+    now = time.monotonic()
+    cache = _latest_round_cache
+    if cache['value'] is not None and cache['stamp'] == stamp and now - cache['checked_at'] < LATEST_ROUND_TTL:
+        return cache['value']
+
+    with _latest_round_lock:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(round_no) as max_round FROM history')
+        result = cursor.fetchone()
+        conn.close()
+        cache['value'] = result['max_round'] if result and result['max_round'] else 0
+        cache['stamp'] = stamp
+        cache['checked_at'] = now
+        return cache['value']
+
+def publish_latest_round(round_no):
+    """Records the latest round in the marker file so web workers drop their cached value."""
+    tmp_path = LATEST_ROUND_MARKER_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(round_no))
+    os.replace(tmp_path, LATEST_ROUND_MARKER_PATH)
+
+def init_db(migrate=True):
+    """Initializes the database tables, then applies pending schema migrations."""
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
@@ -50,7 +262,17 @@ def init_db():
                 )
             ''')
 
-            # Table 2: my_predictions
+            # Table 2: users (created before my_predictions, which references it)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    username VARCHAR(50) UNIQUE NOT NULL,
+                    password_hash VARCHAR(255) NOT NULL,
+                    created_at VARCHAR(30)
+                )
+            ''')
+
+            # Table 3: my_predictions
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS my_predictions (
                     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -69,16 +291,6 @@ def init_db():
                 )
             ''')
 
-            # Table 3: users
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    created_at VARCHAR(30)
-                )
-            ''')
-
             # Table 4: winning_stores
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS winning_stores (
@@ -126,5 +338,9 @@ def init_db():
     finally:
         conn.close()
 
+    if migrate:
+        from src.migrations import run_migrations
+        run_migrations()
+
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+from src.database import get_connection
+
+# Append-only multi-hot store: row (round_no - 1) holds the 45 uint8 flags of
+# that round's six main numbers. Rounds are dense, so the row offset is the key
+# and a missing round shows up as an all-zero row.
+HISTORY_STORE_PATH = 'data/history_encoded.u8'
+ROW_SIZE = 45
+
+
+def encode_numbers(nums):
+    """Multi-hot encodes one draw into a (45,) uint8 row."""
+    row = np.zeros(ROW_SIZE, dtype=np.uint8)
+    row[np.asarray(nums, dtype=np.int64) - 1] = 1
+    return row
+
+
+def open_store(path=HISTORY_STORE_PATH):
+    """Memory-maps the store read-only as an (n_rounds, 45) array, or None if missing."""
+    if not os.path.exists(path) or os.path.getsize(path) < ROW_SIZE:
+        return None
+    n_rounds = os.path.getsize(path) // ROW_SIZE
+    return np.memmap(path, dtype=np.uint8, mode='r', shape=(n_rounds, ROW_SIZE))
+
+
+def append_draw(round_no, nums, path=HISTORY_STORE_PATH):
+    """Writes one round into its slot, extending the file if needed."""
+    mode = 'r+b' if os.path.exists(path) else 'w+b'
+    with open(path, mode) as f:
+        f.seek((round_no - 1) * ROW_SIZE)
+        f.write(encode_numbers(nums).tobytes())
+
+
+def resync_from_db(path=HISTORY_STORE_PATH):
+    """Rebuilds the whole store from the history table."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT round_no, num1, num2, num3, num4, num5, num6 FROM history ORDER BY round_no ASC')
+    rows = cursor.fetchall()
+    conn.close()
+
+    n_rounds = rows[-1]['round_no'] if rows else 0
+    encoded = np.zeros((n_rounds, ROW_SIZE), dtype=np.uint8)
+    for row in rows:
+        encoded[row['round_no'] - 1] = encode_numbers([row[f'num{i}'] for i in range(1, 7)])
+
+    # Swap the file in so readers holding the old mapping are unaffected.
+    tmp_path = path + '.tmp'
+    encoded.tofile(tmp_path)
+    os.replace(tmp_path, path)
+    print(f"Resynced encoded history store with {len(rows)} rounds.")
+
+
+def _history_state():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT MAX(round_no) as max_round, COUNT(*) as count FROM history')
+    result = cursor.fetchone()
+    conn.close()
+    return (result['max_round'] or 0), result['count']
+
+
+def load_encoded_history(path=HISTORY_STORE_PATH):
+    """Returns all recorded draws (oldest first) as an (n, 45) uint8 array.
+
+    The store is memory-mapped instead of querying the history table. If it
+    is missing, has a gap, or disagrees with the table, it is rebuilt first.
+    """
+    max_round, count = _history_state()
+    if max_round == 0:
+        return np.zeros((0, ROW_SIZE), dtype=np.uint8)
+
+    for attempt in range(2):
+        encoded = open_store(path)
+        if encoded is not None and len(encoded) >= max_round:
+            present = encoded[:max_round].sum(axis=1)
+            if np.isin(present, (0, 6)).all() and np.count_nonzero(present) == count:
+                if count == max_round:
+                    return encoded[:max_round]
+                # The table itself skips rounds; only return recorded ones.
+                return encoded[:max_round][present == 6]
+        if attempt == 0:
+            print("Encoded history store is out of sync with the database.")
+            resync_from_db(path)
+
+    raise RuntimeError(f"Encoded history store at {path} could not be synced")
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+from src.analyst import SEQUENCE_LENGTH, get_predictor
+from src.history_store import load_encoded_history
+from src.bitmask import masks_from_array
+from src.sampler import sample_unique
+
+# How long the first request of a batch waits for others to join it (seconds).
+BATCH_WINDOW = float(os.getenv('PREDICT_BATCH_WINDOW', 0.02))
+
+
+class _PendingRequest:
+    def __init__(self, last_round, num_sets, exclude):
+        self.last_round = last_round
+        self.num_sets = num_sets
+        self.exclude = exclude or set()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictionService:
+    """Serves prediction sets from a cached probability vector.
+
+    All users predicting for the same round feed the model the same input
+    (the last SEQUENCE_LENGTH draws), so the forward pass runs once per
+    (model version, last round). Requests arriving within BATCH_WINDOW are
+    coalesced and sampled together in one NumPy call.
+    """
+
+    def __init__(self, predictor=None, batch_window=BATCH_WINDOW):
+        self.predictor = predictor or get_predictor()
+        self.batch_window = batch_window
+        self._probs_key = None
+        self._probs = None
+        self._probs_lock = threading.Lock()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._leader_active = False
+
+    def get_probs(self, last_round):
+        """Returns the probability vector for the round after last_round."""
+        self.predictor.get_model()
+        key = (self.predictor.version, last_round)
+        if key == self._probs_key:
+            return self._probs
+
+        with self._probs_lock:
+            if key != self._probs_key:
+                history = load_encoded_history()[-SEQUENCE_LENGTH:]
+                self._probs = self.predictor.predict_probs(history)
+                self._probs_key = key
+            return self._probs
+
+    def generate(self, last_round, num_sets=5, exclude=None):
+        """Returns num_sets unique sorted combinations for the round after last_round.
+
+        exclude is an optional set of combination bitmasks that must not be returned.
+        """
+        request = _PendingRequest(last_round, num_sets, exclude)
+        with self._pending_lock:
+            self._pending.append(request)
+            is_leader = not self._leader_active
+            self._leader_active = True
+
+        if is_leader:
+            time.sleep(self.batch_window)
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+                self._leader_active = False
+            self._run_batch(batch)
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run_batch(self, batch):
+        by_round = {}
+        for request in batch:
+            by_round.setdefault(request.last_round, []).append(request)
+
+        for last_round, requests in by_round.items():
+            try:
+                probs = self.get_probs(last_round)
+                if probs is None:
+                    for request in requests:
+                        request.result = []
+                else:
+                    self._fill_requests(probs, requests)
+            except Exception as e:
+                for request in requests:
+                    request.error = e
+            finally:
+                for request in requests:
+                    request.done.set()
+
+    def _fill_requests(self, probs, requests):
+        # One vectorized draw of distinct sets for the whole batch, dealt out
+        # to the requests; a request whose exclusions used up its share is topped up.
+        total = sum(r.num_sets for r in requests)
+        pool = sample_unique(probs, total)
+        pool_masks = masks_from_array(pool).tolist()
+        pool = pool.tolist()
+        for request in requests:
+            picked, picked_masks = [], set()
+            while pool and len(picked) < request.num_sets:
+                candidate, mask = pool.pop(), pool_masks.pop()
+                if mask not in request.exclude:
+                    picked.append(candidate)
+                    picked_masks.add(mask)
+            if len(picked) < request.num_sets:
+                extra = sample_unique(
+                    probs, request.num_sets - len(picked), exclude=request.exclude | picked_masks
+                )
+                picked.extend(extra.tolist())
+            request.result = picked
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_prediction_service():
+    """Returns the prediction service shared by all requests in this process."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = PredictionService()
+    return _service
@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import signal
+import time
+import struct
+import socket
+import socketserver
+
+# One long-lived process owns the Keras model and serves every web worker over
+# a Unix domain socket. Each message is a 4-byte big-endian length followed by
+# that many bytes of UTF-8 JSON.
+#
+#   request:  {"op": "generate", "last_round": 1160, "num_sets": 5, "exclude": [mask, ...]}
+#             {"op": "ping"}
+#   response: {"ok": true, "result": [[n1, ..., n6], ...]}
+#             {"ok": false, "error": "..."}
+INFERENCE_SOCKET = os.getenv('INFERENCE_SOCKET', 'data/inference.sock')
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 30))
+# After a failed call, go straight to the local fallback for this long (seconds)
+INFERENCE_RETRY_INTERVAL = float(os.getenv('INFERENCE_RETRY_INTERVAL', 30))
+MAX_MESSAGE_SIZE = 1 << 20
+
+_HEADER = struct.Struct('>I')
+
+
+class InferenceUnavailable(Exception):
+    """Raised by the client when the inference worker cannot be reached."""
+
+
+class InferenceError(Exception):
+    """Raised by the client when the inference worker reports a failure."""
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("connection closed mid-message")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, payload):
+    data = json.dumps(payload).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    """Reads one message, or returns None if the peer closed the connection cleanly."""
+    header = sock.recv(_HEADER.size)
+    if not header:
+        return None
+    header += _recv_exactly(sock, _HEADER.size - len(header))
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"message of {size} bytes exceeds the {MAX_MESSAGE_SIZE} byte limit")
+    return json.loads(_recv_exactly(sock, size))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # A connection may carry several requests; each runs on this thread,
+        # and concurrent ones are coalesced by the PredictionService.
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, ValueError) as e:
+                print(f"Inference connection dropped: {e}")
+                return
+            if request is None:
+                return
+            send_message(self.request, self.server.dispatch(request))
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path=INFERENCE_SOCKET, service=None):
+        if service is None:
+            from src.inference import get_prediction_service
+            service = get_prediction_service()
+        self.service = service
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)  # left over from a previous run
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+    def dispatch(self, request):
+        op = request.get('op')
+        try:
+            if op == 'ping':
+                return {"ok": True, "result": "pong"}
+            if op == 'generate':
+                result = self.service.generate(
+                    int(request['last_round']),
+                    num_sets=int(request.get('num_sets', 5)),
+                    exclude=set(request.get('exclude') or ()),
+                )
+                return {"ok": True, "result": [[int(n) for n in combo] for combo in result]}
+            return {"ok": False, "error": f"unknown op {op!r}"}
+        except Exception as e:
+            print(f"Inference request failed: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def serve(path=INFERENCE_SOCKET):
+    """Runs the inference worker until interrupted."""
+    server = InferenceServer(path)
+    # Load the model up front so the first user request does not pay for it.
+    server.service.predictor.get_model()
+    print(f"Inference worker listening on {path}")
+    # docker/start.sh stop with SIGTERM; exit through the finally below
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class InferenceClient:
+    """Talks to the inference worker; one short-lived connection per call."""
+
+    def __init__(self, path=INFERENCE_SOCKET, timeout=INFERENCE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+
+    def call(self, request):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                send_message(sock, request)
+                response = recv_message(sock)
+        except (OSError, ValueError) as e:
+            raise InferenceUnavailable(f"inference worker at {self.path} unavailable: {e}") from e
+        if response is None:
+            raise InferenceUnavailable("inference worker closed the connection")
+        if not response.get('ok'):
+            raise InferenceError(response.get('error', 'unknown error'))
+        return response['result']
+
+    def generate(self, last_round, num_sets=5, exclude=None):
+        return self.call({
+            "op": "generate",
+            "last_round": last_round,
+            "num_sets": num_sets,
+            "exclude": sorted(exclude or ()),
+        })
+
+    def ping(self):
+        return self.call({"op": "ping"}) == "pong"
+
+
+_client = InferenceClient()
+_unavailable_until = {'t': 0.0}
+
+def generate_predictions(last_round, num_sets=5, exclude=None):
+    """Generates prediction sets through the inference worker.
+
+    Falls back to an in-process PredictionService (loading TensorFlow in
+    this process) when the worker is not running or does not answer, and
+    then skips the worker for INFERENCE_RETRY_INTERVAL seconds.
+    """
+    if time.monotonic() >= _unavailable_until['t']:
+        try:
+            return _client.generate(last_round, num_sets=num_sets, exclude=exclude)
+        except InferenceUnavailable as e:
+            _unavailable_until['t'] = time.monotonic() + INFERENCE_RETRY_INTERVAL
+            print(f"{e}. Falling back to local inference.")
+
+    from src.inference import get_prediction_service
+    return get_prediction_service().generate(last_round, num_sets=num_sets, exclude=exclude)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,84 @@
+from datetime import datetime
+from src.database import get_connection
+
+# Versioned schema changes applied on top of the tables created by init_db().
+# Each entry is (version, description, statements). Statements use MariaDB's
+# IF [NOT] EXISTS forms so a migration interrupted half-way can simply re-run.
+MIGRATIONS = [
+    (1, "Prediction grading columns and soft-delete flags", [
+        "ALTER TABLE my_predictions ADD COLUMN IF NOT EXISTS matched_count INT",
+        "ALTER TABLE my_predictions ADD COLUMN IF NOT EXISTS bonus_matched BOOLEAN",
+        "ALTER TABLE my_predictions ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN DEFAULT 0",
+    ]),
+    (2, "Combination bitmask columns (see src/bitmask.py)", [
+        "ALTER TABLE history ADD COLUMN IF NOT EXISTS combo_mask BIGINT UNSIGNED",
+        "ALTER TABLE my_predictions ADD COLUMN IF NOT EXISTS combo_mask BIGINT UNSIGNED",
+        "CREATE INDEX IF NOT EXISTS idx_history_combo_mask ON history (combo_mask)",
+        "CREATE INDEX IF NOT EXISTS idx_predictions_user_round_combo ON my_predictions (user_id, round_no, combo_mask)",
+        '''
+        UPDATE history
+        SET combo_mask = (1 << (num1 - 1)) | (1 << (num2 - 1)) | (1 << (num3 - 1))
+                       | (1 << (num4 - 1)) | (1 << (num5 - 1)) | (1 << (num6 - 1))
+        WHERE combo_mask IS NULL
+        ''',
+        '''
+        UPDATE my_predictions
+        SET combo_mask = (1 << (num1 - 1)) | (1 << (num2 - 1)) | (1 << (num3 - 1))
+                       | (1 << (num4 - 1)) | (1 << (num5 - 1)) | (1 << (num6 - 1))
+        WHERE combo_mask IS NULL
+        ''',
+    ]),
+    (3, "Indexes for hot web and auditor queries", [
+        # / and /mypage: WHERE user_id = ? AND is_deleted = 0 ORDER BY created_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_predictions_user_active_created ON my_predictions (user_id, is_deleted, created_at)",
+        # Auditor: WHERE rank_val = '미추첨' [AND round_no = ?]
+        "CREATE INDEX IF NOT EXISTS idx_predictions_rank_round ON my_predictions (rank_val, round_no)",
+        # Collapse duplicate prize rows (keep the newest) before making (round_no, rank_no) unique.
+        # The unique key also serves WHERE round_no = ? and SELECT DISTINCT round_no.
+        '''
+        DELETE p1 FROM prizes p1
+        JOIN prizes p2 ON p1.round_no = p2.round_no AND p1.rank_no = p2.rank_no AND p1.id < p2.id
+        ''',
+        "ALTER TABLE prizes ADD UNIQUE INDEX IF NOT EXISTS uq_prizes_round_rank (round_no, rank_no)",
+        # winning_stores(round_no) is already indexed by its foreign key.
+    ]),
+]
+
+def get_applied_versions(cursor):
+    """Returns the set of migration versions already recorded."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at VARCHAR(30)
+        )
+    ''')
+    cursor.execute('SELECT version FROM schema_migrations')
+    return {row['version'] for row in cursor.fetchall()}
+
+def run_migrations(target_version=None, conn=None):
+    """Applies pending migrations in order, up to target_version (default: all)."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        applied = get_applied_versions(cursor)
+        for version, description, statements in MIGRATIONS:
+            if version in applied or (target_version is not None and version > target_version):
+                continue
+            print(f"Applying migration {version}: {description}")
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                'INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)',
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,66 @@
+import numpy as np
+
+from src.bitmask import masks_from_array
+
+# Weighted sampling of 6-of-45 combinations from the model's probability vector.
+#
+# Gumbel-top-k: adding independent Gumbel noise to log(p) and keeping the 6
+# largest keys is equivalent to drawing 6 numbers without replacement with
+# weights p. K sets are one (K, 45) noise matrix and one argpartition, so the
+# cost is a few microseconds per set instead of a Python-level loop per draw.
+
+PICKS = 6
+# Give up after this many vectorized rounds (probabilities too concentrated
+# to yield enough distinct combinations); the caller gets fewer sets.
+MAX_ROUNDS = 10
+
+
+def make_rng(seed=None):
+    """Returns a Generator from a seed, an existing Generator, or fresh entropy."""
+    return np.random.default_rng(seed)
+
+
+def sample_combinations(predicted_probs, num_sets, rng=None):
+    """Draws num_sets weighted combinations in one vectorized call (duplicates possible).
+
+    rng is a seed or np.random.Generator. Returns a (num_sets, 6) array of sorted numbers.
+    """
+    rng = make_rng(rng)
+    log_p = np.log(np.clip(np.asarray(predicted_probs, dtype='float64'), 1e-12, None))
+    keys = log_p + rng.gumbel(size=(num_sets, log_p.shape[-1]))
+    picks = np.argpartition(-keys, PICKS, axis=1)[:, :PICKS] + 1
+    picks.sort(axis=1)
+    return picks
+
+
+def sample_unique(predicted_probs, num_sets, exclude=None, rng=None):
+    """Draws num_sets distinct weighted combinations, none of them in exclude.
+
+    exclude is an optional set of combination bitmasks (see src.bitmask).
+    Duplicates are removed with np.unique over the bitmasks, keeping draw
+    order, and any shortfall is topped up with another vectorized round.
+    Returns a (m, 6) array with m == num_sets unless the distribution is too
+    concentrated to produce that many distinct sets.
+    """
+    rng = make_rng(rng)
+    excluded = np.fromiter(exclude, dtype=np.uint64) if exclude else np.zeros(0, dtype=np.uint64)
+    picked = np.zeros((0, PICKS), dtype=np.int64)
+    picked_masks = np.zeros(0, dtype=np.uint64)
+
+    for _ in range(MAX_ROUNDS):
+        needed = num_sets - len(picked)
+        if needed <= 0:
+            break
+        # Headroom for duplicates so one round is usually enough
+        draws = sample_combinations(predicted_probs, needed + needed // 4 + 8, rng)
+        masks = masks_from_array(draws)
+
+        _, first = np.unique(masks, return_index=True)
+        first.sort()
+        draws, masks = draws[first], masks[first]
+        fresh = ~np.isin(masks, excluded) & ~np.isin(masks, picked_masks)
+
+        picked = np.concatenate([picked, draws[fresh][:needed]])
+        picked_masks = np.concatenate([picked_masks, masks[fresh][:needed]])
+
+    return picked
@@ -1,9 +1,17 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import io
-import base64
+import numpy as np
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
 from src.database import get_engine
 
+# Precomputed /analysis data, rebuilt by the collector when a new round lands
+ANALYTICS_SNAPSHOT_PATH = 'data/analytics_snapshot.json'
+# Bumped when the snapshot layout changes so old files are rebuilt on read
+SNAPSHOT_VERSION = 2
+
 def get_history_df():
     """Loads history data into a pandas DataFrame."""
     engine = get_engine()
@@ -13,27 +21,29 @@ def get_history_df():
     # For this simple app, letting it persist or GC is fine.
     return df
 
-def get_frequency_data(top_n=45, limit=None):
+def get_frequency_data(top_n=45, limit=None, df=None):
     """Returns frequency data for all numbers, optionally limited to recent rounds."""
-    df = get_history_df()
+    if df is None:
+        df = get_history_df()
     if df.empty:
         return {}
     
     if limit:
         df = df.sort_values('round_no', ascending=False).head(limit)
         
-    # Melt the dataframe to get all numbers in one column
-    nums = pd.concat([df[f'num{i}'] for i in range(1, 7)])
-    counts = nums.value_counts().sort_index() # Sort by number (1-45)
+    # Count on the raw integer array instead of melting into a Series
+    nums = df[[f'num{i}' for i in range(1, 7)]].to_numpy(dtype=np.int64).ravel()
+    counts = np.bincount(nums, minlength=46)
     
-    # Return as dict: {number: count}
-    return counts.to_dict()
+    # Return as dict: {number: count}, numbers that appeared only, sorted 1-45
+    return {n: int(counts[n]) for n in range(1, 46) if counts[n]}
 
-def get_trend_data(last_n_rounds=None):
+def get_trend_data(last_n_rounds=None, df=None):
     """Returns winning numbers for trend chart.
     If last_n_rounds is None, returns all data.
     Otherwise returns only the last N rounds."""
-    df = get_history_df()
+    if df is None:
+        df = get_history_df()
     if df.empty:
         return []
     
@@ -48,6 +58,37 @@ def get_trend_data(last_n_rounds=None):
     # Format: list of {round_no: N, num1: ..., num6: ...}
     return result_df.to_dict(orient='records')
 
+def get_trend_columns(df=None):
+    """Returns the full trend series in columnar form, oldest round first.
+
+    {'rounds': [r, ...], 'nums': [[num1 of each round], ..., [num6 of each round]]}
+    is a fraction of the size of the per-round dicts from get_trend_data.
+    """
+    if df is None:
+        df = get_history_df()
+    df = df.sort_values('round_no', ascending=True)
+    return {
+        'rounds': df['round_no'].astype(int).tolist(),
+        'nums': [df[f'num{i}'].astype(int).tolist() for i in range(1, 7)],
+    }
+
+def slice_trend(trend, start=None, end=None, step=1):
+    """Restricts a columnar trend series to rounds in [start, end], keeping every
+    step-th round counted back from the newest one so the latest draw is always kept."""
+    rounds = np.asarray(trend['rounds'], dtype=np.int64)
+    keep = np.ones(len(rounds), dtype=bool)
+    if start is not None:
+        keep &= rounds >= start
+    if end is not None:
+        keep &= rounds <= end
+    idx = np.flatnonzero(keep)
+    if step > 1:
+        idx = idx[::-1][::step][::-1]
+    return {
+        'rounds': rounds[idx].tolist(),
+        'nums': [np.asarray(col)[idx].tolist() for col in trend['nums']],
+    }
+
 def get_winner_count_data():
     """Returns 1st prize winner counts for trend chart."""
     engine = get_engine()
@@ -64,3 +105,67 @@ def get_winner_count_data():
         return []
 
     return df.to_dict(orient='records')
+
+def get_winner_columns():
+    """Returns get_winner_count_data() in columnar form: rounds, draw_dates, counts."""
+    rows = get_winner_count_data()
+    return {
+        'rounds': [int(r['round_no']) for r in rows],
+        'draw_dates': [str(r['draw_date']) for r in rows],
+        'counts': [int(r['winner_count']) for r in rows],
+    }
+
+
+def build_analytics_snapshot():
+    """Computes everything the /analysis page needs from one read of history and prizes."""
+    df = get_history_df()
+    return {
+        'version': SNAPSHOT_VERSION,
+        'last_round': int(df['round_no'].max()) if not df.empty else 0,
+        'generated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'freq_data': {int(k): int(v) for k, v in get_frequency_data(df=df).items()},
+        'recent_freq_data': {int(k): int(v) for k, v in get_frequency_data(limit=20, df=df).items()},
+        'trend': get_trend_columns(df=df),
+        'winners': get_winner_columns(),
+    }
+
+def rebuild_analytics_snapshot(path=ANALYTICS_SNAPSHOT_PATH):
+    """Rebuilds the snapshot file. Written to a temp file and swapped in atomically."""
+    snapshot = build_analytics_snapshot()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+    print(f"Analytics snapshot rebuilt for round {snapshot['last_round']}")
+    return snapshot
+
+_snapshot_cache = {'stamp': None, 'data': None, 'etag': None}
+_snapshot_lock = threading.Lock()
+
+def get_analytics_snapshot(path=ANALYTICS_SNAPSHOT_PATH):
+    """Returns (snapshot, etag), served from memory until the file changes.
+
+    Builds the file on first use if the collector has not written it yet.
+    """
+    with _snapshot_lock:
+        if not os.path.exists(path):
+            rebuild_analytics_snapshot(path)
+
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != _snapshot_cache['stamp']:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+            if data.get('version') != SNAPSHOT_VERSION:
+                # Written by an older release; rebuild in the current layout.
+                rebuild_analytics_snapshot(path)
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                data = json.loads(raw)
+                st = os.stat(path)
+                stamp = (st.st_mtime_ns, st.st_size)
+            _snapshot_cache['data'] = data
+            _snapshot_cache['etag'] = hashlib.sha1(raw).hexdigest()[:16]
+            _snapshot_cache['stamp'] = stamp
+        return _snapshot_cache['data'], _snapshot_cache['etag']
@@ -1,23 +1,38 @@
 from fastapi import FastAPI, Request, Form, Depends, HTTPException, status
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
 import uvicorn
+import asyncio
+import hmac
 from datetime import datetime, timedelta
 import math
 from typing import Optional
 from urllib.parse import quote
 
-from src.database import get_connection
+from src.database import get_connection, get_latest_round
 from src.analyst import run_analyst
-from src.visualizer import get_frequency_data, get_trend_data, get_winner_count_data
+from src.visualizer import get_analytics_snapshot, slice_trend
+from src.combo_index import get_combo_index
+from src.workers import BoundedExecutor, WorkerPoolSaturated
+from src.cache import ResponseCacheMiddleware, cache_key, get_or_set
 from src.auth import (
-    create_user, authenticate_user, create_access_token, 
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    create_user_async, authenticate_user_async, create_access_token,
+    get_current_user, invalidate_user, password_executor, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 app = FastAPI()
+# Pages that only change when the collector commits: anonymous visitors get a
+# cached copy, keyed by the latest round (added first so it stores uncompressed bodies).
+app.add_middleware(
+    ResponseCacheMiddleware,
+    paths=[r"/", r"/history", r"/history/\d+"],
+    version=lambda: get_latest_round(),
+)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -26,6 +41,75 @@ import os
 if not os.path.exists("templates"):
     os.makedirs("templates")
 
+# Predictions are TensorFlow-heavy and synchronous, so they run in a bounded
+# thread pool instead of on the event loop.
+prediction_executor = BoundedExecutor(
+    "predict",
+    max_workers=int(os.getenv("PREDICT_WORKERS", 2)),
+    max_queue=int(os.getenv("PREDICT_QUEUE_DEPTH", 8)),
+    timeout=float(os.getenv("PREDICT_TIMEOUT", 60)),
+)
+
+# Scans over the 8M-row combination index take ~0.1s of CPU each.
+combo_executor = BoundedExecutor(
+    "combo",
+    max_workers=int(os.getenv("COMBO_WORKERS", 2)),
+    max_queue=int(os.getenv("COMBO_QUEUE_DEPTH", 16)),
+    timeout=float(os.getenv("COMBO_TIMEOUT", 10)),
+)
+
+async def run_prediction(user_id):
+    """Runs run_analyst off the event loop, mapping saturation/timeouts to HTTP errors."""
+    try:
+        await prediction_executor.run(run_analyst, user_id=user_id)
+    except WorkerPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="예측 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "10"},
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="예측 생성 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.",
+        )
+
+async def run_password_task(coro):
+    """Awaits a bcrypt-backed auth call, mapping saturation/timeouts to HTTP errors."""
+    try:
+        return await coro
+    except WorkerPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="로그인 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "5"},
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="로그인 처리 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.",
+        )
+
+# Internal monitoring only: the endpoint is disabled unless METRICS_TOKEN is
+# set, and then requires "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+def require_metrics_token(request: Request):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@app.get("/metrics/executors", dependencies=[Depends(require_metrics_token)])
+async def executor_metrics():
+    """Load and queue-wait statistics of the background worker pools."""
+    return {"executors": [prediction_executor.stats(), password_executor.stats(), combo_executor.stats()]}
+
 # Auth Routes
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -37,14 +121,14 @@ async def register_page(request: Request):
 
 @app.post("/register")
 async def register(username: str = Form(...), password: str = Form(...)):
-    if create_user(username, password):
+    if await run_password_task(create_user_async(username, password)):
         return JSONResponse(content={"message": "User created successfully"}, status_code=200)
     else:
         raise HTTPException(status_code=400, detail="Username already exists")
 
 @app.post("/token")
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await run_password_task(authenticate_user_async(form_data.username, form_data.password))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,10 +151,7 @@ async def get_current_user_from_cookie(request: Request):
     except HTTPException:
         return None
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    user = await get_current_user_from_cookie(request)
-    
+def load_latest_result():
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -83,37 +164,127 @@ async def read_root(request: Request):
         # Get prizes for this round
         cursor.execute('SELECT * FROM prizes WHERE round_no = %s ORDER BY rank_no ASC', (latest_result['round_no'],))
         prizes = cursor.fetchall()
+    
+    conn.close()
+    return {"latest_result": latest_result, "prizes": prizes}
+
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    user = await get_current_user_from_cookie(request)
+    
+    # The latest result is the same for everyone; only the predictions are per user.
+    latest = get_or_set(cache_key('home', get_latest_round()), load_latest_result)
 
     # Get next round prediction if exists
     # If user is logged in, show their predictions.
     recent_predictions = []
     if user:
+        conn = get_connection()
+        cursor = conn.cursor()
         cursor.execute('SELECT * FROM my_predictions WHERE user_id = %s AND is_deleted = 0 ORDER BY created_at DESC LIMIT 5', (user['id'],))
         recent_predictions = cursor.fetchall()
-    
-    conn.close()
+        conn.close()
     
     return templates.TemplateResponse("index.html", {
         "request": request,
-        "latest_result": latest_result,
-        "prizes": prizes,
+        "latest_result": latest["latest_result"],
+        "prizes": latest["prizes"],
         "predictions": recent_predictions,
         "user": user
     })
 
+MYPAGE_PAGE_SIZE = 20
+
+def fetch_prediction_page(cursor, user_id, before_id=None, limit=MYPAGE_PAGE_SIZE):
+    """Keyset page of a user's predictions, newest first.
+
+    Walks idx_predictions_user_active_created; before_id is the id of the last
+    prediction already shown. Returns (items, next_cursor).
+    """
+    if before_id:
+        cursor.execute(
+            'SELECT created_at FROM my_predictions WHERE id = %s AND user_id = %s',
+            (before_id, user_id)
+        )
+        anchor = cursor.fetchone()
+        if not anchor:
+            return [], None
+        cursor.execute('''
+            SELECT * FROM my_predictions
+            WHERE user_id = %s AND is_deleted = 0
+              AND (created_at < %s OR (created_at = %s AND id < %s))
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        ''', (user_id, anchor['created_at'], anchor['created_at'], before_id, limit + 1))
+    else:
+        cursor.execute('''
+            SELECT * FROM my_predictions
+            WHERE user_id = %s AND is_deleted = 0
+            ORDER BY created_at DESC, id DESC LIMIT %s
+        ''', (user_id, limit + 1))
+    items = cursor.fetchall()
+    next_cursor = items[limit - 1]['id'] if len(items) > limit else None
+    return items[:limit], next_cursor
+
+def fetch_round_summaries(cursor, user_id, round_nos):
+    """Per-round rank counts for the given rounds, newest round first."""
+    if not round_nos:
+        return []
+    round_nos = sorted(set(round_nos))
+    placeholders = ', '.join(['%s'] * len(round_nos))
+    cursor.execute(f'''
+        SELECT round_no, COALESCE(rank_val, '미추첨') AS rank_val, COUNT(*) AS cnt
+        FROM my_predictions
+        WHERE user_id = %s AND is_deleted = 0 AND round_no IN ({placeholders})
+        GROUP BY round_no, COALESCE(rank_val, '미추첨')
+        ORDER BY round_no DESC
+    ''', (user_id, *round_nos))
+
+    summaries = {}
+    for row in cursor.fetchall():
+        summary = summaries.setdefault(row['round_no'], {"round_no": row['round_no'], "total": 0, "ranks": {}})
+        summary["ranks"][row['rank_val']] = row['cnt']
+        summary["total"] += row['cnt']
+    return list(summaries.values())
+
+def load_mypage(user_id, before_id=None, limit=MYPAGE_PAGE_SIZE):
+    conn = get_connection()
+    cursor = conn.cursor()
+    predictions, next_cursor = fetch_prediction_page(cursor, user_id, before_id, limit)
+    summaries = fetch_round_summaries(cursor, user_id, [p['round_no'] for p in predictions])
+    conn.close()
+    return predictions, summaries, next_cursor
+
 @app.get("/mypage", response_class=HTMLResponse)
 async def mypage(request: Request):
     user = await get_current_user_from_cookie(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
-    
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM my_predictions WHERE user_id = %s AND is_deleted = 0 ORDER BY created_at DESC', (user['id'],))
-    predictions = cursor.fetchall()
-    conn.close()
-    
-    return templates.TemplateResponse("mypage.html", {"request": request, "user": user, "predictions": predictions})
+
+    # Only the first page is rendered; the rest is loaded from /api/mypage.
+    predictions, summaries, next_cursor = load_mypage(user['id'])
+
+    return templates.TemplateResponse("mypage.html", {
+        "request": request,
+        "user": user,
+        "predictions": predictions,
+        "summaries": summaries,
+        "next_cursor": next_cursor
+    })
+
+@app.get("/api/mypage")
+async def mypage_api(request: Request, cursor: Optional[int] = None, limit: int = MYPAGE_PAGE_SIZE):
+    """JSON page of the user's predictions with per-round rank counts."""
+    user = await get_current_user_from_cookie(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    limit = max(1, min(limit, 100))
+    predictions, summaries, next_cursor = load_mypage(user['id'], cursor, limit)
+    return JSONResponse(content=jsonable_encoder({
+        "items": predictions,
+        "summaries": summaries,
+        "next_cursor": next_cursor
+    }))
 
 @app.post("/delete_prediction/{id}")
 async def delete_prediction(id: int, request: Request):
@@ -160,6 +331,7 @@ async def delete_account(request: Request):
         cursor.execute('UPDATE users SET is_deleted = 1 WHERE id = %s', (user['id'],))
         
         conn.commit()
+        invalidate_user(user['username'])
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete account")
@@ -170,14 +342,17 @@ async def delete_account(request: Request):
     response.delete_cookie("access_token")
     return response
 
-@app.get("/history", response_class=HTMLResponse)
-async def history_page(request: Request, page: int = 1, limit: int = 10, search_round: Optional[int] = None):
-    user = await get_current_user_from_cookie(request)
-    
-    # Validate limit to avoid abuse
-    if limit not in [10, 25, 50]:
-        limit = 10
+HISTORY_PAGE_SIZES = [10, 25, 50]
 
+def fetch_history_page(cursor, before_round, limit):
+    """Keyset page: up to `limit` rounds below before_round, newest first (index range scan on the PK)."""
+    cursor.execute(
+        'SELECT * FROM history WHERE round_no < %s ORDER BY round_no DESC LIMIT %s',
+        (before_round, limit)
+    )
+    return cursor.fetchall()
+
+def load_history_page(page, limit, search_round):
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -187,37 +362,58 @@ async def history_page(request: Request, page: int = 1, limit: int = 10, search_
         history_items = cursor.fetchall()
         total_pages = 1
         current_page = 1
-        total_count = len(history_items)
     else:
-        # Normal pagination
-        offset = (page - 1) * limit
-        
-        # Get total count
-        cursor.execute('SELECT COUNT(*) as count FROM history')
-        total_count = cursor.fetchone()['count']
+        # round_no is dense, so the latest round is the total count and
+        # page N starts right below round latest - (N-1) * limit.
+        total_count = get_latest_round()
         total_pages = math.ceil(total_count / limit)
-        current_page = page
+        current_page = max(page, 1)
         
-        # Get items
-        cursor.execute('SELECT * FROM history ORDER BY round_no DESC LIMIT %s OFFSET %s', (limit, offset))
-        history_items = cursor.fetchall()
+        before_round = total_count - (current_page - 1) * limit + 1
+        history_items = fetch_history_page(cursor, before_round, limit)
     
     conn.close()
+    return {"history": history_items, "page": current_page, "total_pages": total_pages}
+
+@app.get("/history", response_class=HTMLResponse)
+async def history_page(request: Request, page: int = 1, limit: int = 10, search_round: Optional[int] = None):
+    user = await get_current_user_from_cookie(request)
+    
+    # Validate limit to avoid abuse
+    if limit not in HISTORY_PAGE_SIZES:
+        limit = 10
+
+    result = get_or_set(
+        cache_key('history', page, limit, search_round, get_latest_round()),
+        lambda: load_history_page(page, limit, search_round)
+    )
     
     return templates.TemplateResponse("history.html", {
         "request": request, 
         "user": user, 
-        "history": history_items,
-        "page": current_page,
-        "total_pages": total_pages,
+        "history": result["history"],
+        "page": result["page"],
+        "total_pages": result["total_pages"],
         "limit": limit,
         "search_round": search_round if search_round else ""
     })
 
-@app.get("/history/{round_no}", response_class=HTMLResponse)
-async def history_detail(request: Request, round_no: int):
-    user = await get_current_user_from_cookie(request)
-    
+@app.get("/api/history")
+async def history_api(cursor: Optional[int] = None, limit: int = 25):
+    """JSON history feed for infinite scroll. Pass next_cursor back as cursor to get the next page."""
+    limit = max(1, min(limit, max(HISTORY_PAGE_SIZES)))
+    before_round = cursor if cursor else get_latest_round() + 1
+
+    conn = get_connection()
+    db_cursor = conn.cursor()
+    items = fetch_history_page(db_cursor, before_round, limit)
+    conn.close()
+
+    next_cursor = items[-1]['round_no'] if len(items) == limit and items[-1]['round_no'] > 1 else None
+    return JSONResponse(content=jsonable_encoder({"items": items, "next_cursor": next_cursor}))
+
+def load_history_detail(round_no):
+    """Round, prizes and winning stores for /history/{round_no}, or None if the round is unknown."""
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -227,7 +423,7 @@ async def history_detail(request: Request, round_no: int):
     
     if not history_item:
         conn.close()
-        raise HTTPException(status_code=404, detail="Round not found")
+        return None
         
     # Get prizes
     cursor.execute('SELECT * FROM prizes WHERE round_no = %s ORDER BY rank_no ASC', (round_no,))
@@ -247,31 +443,149 @@ async def history_detail(request: Request, round_no: int):
             store['map_url'] = None
     
     conn.close()
+    return {"item": history_item, "prizes": prizes, "stores": stores}
+
+@app.get("/history/{round_no}", response_class=HTMLResponse)
+async def history_detail(request: Request, round_no: int):
+    user = await get_current_user_from_cookie(request)
+    
+    detail = get_or_set(
+        cache_key('history_detail', round_no, get_latest_round()),
+        lambda: load_history_detail(round_no)
+    )
+    if not detail:
+        raise HTTPException(status_code=404, detail="Round not found")
     
     return templates.TemplateResponse("history_detail.html", {
         "request": request,
         "user": user,
-        "item": history_item,
-        "prizes": prizes,
-        "stores": stores
+        "item": detail["item"],
+        "prizes": detail["prizes"],
+        "stores": detail["stores"]
     })
 
 @app.get("/analysis", response_class=HTMLResponse)
 async def analysis(request: Request):
     user = await get_current_user_from_cookie(request)
-    freq_data = get_frequency_data()
-    recent_freq_data = get_frequency_data(limit=20)
-    trend_data = get_trend_data(last_n_rounds=None)  # 전체 데이터 로드
-    winner_data = get_winner_count_data()
+    snapshot, snapshot_etag = get_analytics_snapshot()
+
+    # The page only changes with the snapshot (and who is logged in for the header)
+    etag = f'"{snapshot_etag}-{user["id"] if user else 0}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
     
     return templates.TemplateResponse("analysis.html", {
         "request": request,
-        "freq_data": freq_data,
-        "recent_freq_data": recent_freq_data,
-        "trend_data": trend_data,
-        "winner_data": winner_data,
+        "freq_data": snapshot["freq_data"],
+        "recent_freq_data": snapshot["recent_freq_data"],
+        "trend_url": f"/api/trend?v={snapshot['last_round']}",
+        "winners_url": f"/api/winners?v={snapshot['last_round']}",
         "user": user
-    })
+    }, headers=cache_headers)
+
+def versioned_json(request, snapshot_etag, cache_key, v, last_round, build):
+    """JSON response for chart data derived from the analytics snapshot.
+
+    URLs versioned with the current last round (?v=) never change once
+    published and may be cached for good; anything else must revalidate.
+    """
+    if v == last_round:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, no-cache"
+    etag = f'"{snapshot_etag}-{cache_key}"'
+    cache_headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+    return JSONResponse(content={"last_round": last_round, **build()}, headers=cache_headers)
+
+@app.get("/api/trend")
+async def trend_api(request: Request, v: Optional[int] = None, start: Optional[int] = None,
+                    end: Optional[int] = None, step: int = 1):
+    """Columnar winning-number series for the trend chart.
+
+    start/end limit the round range and step keeps every step-th round.
+    """
+    snapshot, snapshot_etag = get_analytics_snapshot()
+    step = max(1, min(step, 100))
+    return versioned_json(
+        request, snapshot_etag, f"trend-{start}-{end}-{step}", v, snapshot["last_round"],
+        lambda: slice_trend(snapshot["trend"], start, end, step)
+    )
+
+@app.get("/api/winners")
+async def winners_api(request: Request, v: Optional[int] = None):
+    """Columnar 1st-prize winner counts per round for the winner chart."""
+    snapshot, snapshot_etag = get_analytics_snapshot()
+    return versioned_json(
+        request, snapshot_etag, "winners", v, snapshot["last_round"],
+        lambda: snapshot["winners"]
+    )
+
+COMBO_TOP_MAX = 100
+
+def require_combo_index():
+    index = get_combo_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="조합 통계 인덱스가 아직 생성되지 않았습니다.")
+    return index
+
+def parse_combo_score(by):
+    """A feature name, or a weighted score such as 'hits3:1,hits4:5'."""
+    if ':' not in by:
+        return by
+    weights = {}
+    for part in by.split(','):
+        name, _, weight = part.partition(':')
+        weights[name.strip()] = float(weight)
+    return weights
+
+@app.get("/api/combo")
+async def combo_api(nums: str):
+    """Exact statistics of one combination against all past draws, e.g. ?nums=1,2,3,4,5,6."""
+    index = require_combo_index()
+    try:
+        stats = index.lookup(int(n) for n in nums.split(','))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"last_round": index.meta["last_round"], **stats}
+
+@app.get("/api/combo/top")
+async def combo_top_api(by: str = "hits3", n: int = 10, largest: bool = True,
+                        sum_min: Optional[int] = None, sum_max: Optional[int] = None,
+                        odd: Optional[int] = None, max_match_max: Optional[int] = None):
+    """Top-n combinations by a feature or weighted score, with optional filters."""
+    index = require_combo_index()
+    n = max(1, min(n, COMBO_TOP_MAX))
+    ranges = {}
+    if sum_min is not None or sum_max is not None:
+        ranges["sum"] = (sum_min, sum_max)
+    if odd is not None:
+        ranges["odd"] = (odd, odd)
+    if max_match_max is not None:
+        ranges["max_match"] = (None, max_match_max)
+
+    try:
+        score = parse_combo_score(by)
+        key = cache_key("combo_top", index.meta["built_at"], by, n, largest, sorted(ranges.items()))
+        items = await combo_executor.run(
+            get_or_set, key, lambda: index.top(score, n, largest, **ranges)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except WorkerPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="조합 조회 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "5"},
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="조합 조회 시간이 초과되었습니다.",
+        )
+    return {"last_round": index.meta["last_round"], "items": items}
 
 @app.post("/predict")
 async def generate_prediction(user: dict = Depends(get_current_user)):
@@ -289,7 +603,7 @@ async def generate_prediction(user: dict = Depends(get_current_user)):
                 detail="매주 토요일 19:30 ~ 21:30 사이에는 복권 발행 마감으로 인해 예측 번호를 생성할 수 없습니다."
             )
 
-    run_analyst(user_id=user['id'])
+    await run_prediction(user['id'])
     return {"message": "Prediction generated successfully"}
 
 # Wrapper for web-based prediction call
@@ -314,7 +628,7 @@ async def generate_prediction_web(request: Request):
              )
     
     print(f"User ID: {user['id']}") # Debug
-    run_analyst(user_id=user['id'])
+    await run_prediction(user['id'])
     return {"message": "Prediction generated successfully"}
 
 if __name__ == "__main__":
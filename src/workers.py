@@ -0,0 +1,101 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Queue waits above this are logged (seconds)
+SLOW_QUEUE_WAIT = 1.0
+
+
+class WorkerPoolSaturated(Exception):
+    """Raised when a bounded executor has no free worker or queue slot."""
+
+
+class BoundedExecutor:
+    """Thread pool with a hard limit on running + queued jobs.
+
+    Used to keep blocking work (TensorFlow, bcrypt, ...) off the asyncio event
+    loop while refusing new work instead of queueing it without bound.
+    """
+
+    def __init__(self, name, max_workers, max_queue, timeout=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._stats_lock = threading.Lock()
+        self._waits = deque(maxlen=1000)  # queue wait of recent jobs (seconds)
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._in_flight = 0
+
+    def _record_wait(self, wait):
+        with self._stats_lock:
+            self._waits.append(wait)
+        if wait > SLOW_QUEUE_WAIT:
+            print(f"[{self.name}] job waited {wait:.2f}s in queue")
+
+    def _timed(self, fn, submitted_at):
+        # Runs on the worker thread: time spent queued is now - submitted_at.
+        self._record_wait(time.monotonic() - submitted_at)
+        return fn()
+
+    def stats(self):
+        """Queue wait statistics over the last 1000 jobs, plus current load."""
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            completed, failed, rejected, in_flight = self._completed, self._failed, self._rejected, self._in_flight
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            "completed": completed,
+            "failed": failed,
+            "rejected": rejected,
+            "queue_wait_avg_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "queue_wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+            "queue_wait_max_ms": round(waits[-1] * 1000, 2) if waits else 0.0,
+        }
+
+    def _release(self, future):
+        # Done callback: the job finished (or was cancelled while queued)
+        with self._stats_lock:
+            self._in_flight -= 1
+            if future is not None and not future.cancelled():
+                if future.exception() is None:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+        self._slots.release()
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) in the pool and awaits the result.
+
+        Raises WorkerPoolSaturated if the pool and its queue are full, and
+        asyncio.TimeoutError if the job does not finish within the timeout.
+        A job that already started keeps its slot until it actually finishes.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise WorkerPoolSaturated(f"{self.name} executor is saturated")
+
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(
+                self._timed, functools.partial(fn, *args, **kwargs), time.monotonic()
+            )
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        # Cancelling the wrapped future on timeout drops jobs that are still queued.
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
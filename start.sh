@@ -4,13 +4,25 @@ export PYTHONPATH=$PYTHONPATH:.
 # Define port
 PORT=${PORT:-8000}
 
+# Single inference worker that owns the model; web workers send it
+# prediction requests over a Unix socket (INFERENCE_SOCKET)
+python main.py inference &
+INFERENCE_PID=$!
+
 # Run Gunicorn with Uvicorn workers
 # -w 4: 4 worker processes
 # -k uvicorn.workers.UvicornWorker: Use Uvicorn for handling requests
 # --bind 0.0.0.0:$PORT: Bind to all interfaces on the specified port
-exec gunicorn src.web_app:app \
+gunicorn src.web_app:app \
     --workers 4 \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:$PORT \
     --access-logfile - \
-    --error-logfile -
+    --error-logfile - &
+WEB_PID=$!
+
+# Stop both on shutdown; if gunicorn exits, take the inference worker down too
+trap 'kill -TERM $WEB_PID $INFERENCE_PID 2>/dev/null' TERM INT
+wait $WEB_PID
+kill -TERM $INFERENCE_PID 2>/dev/null
+wait $INFERENCE_PID
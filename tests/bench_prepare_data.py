@@ -0,0 +1,75 @@
+"""Benchmark: legacy list-based prepare_data vs the vectorized NumPy path.
+
+Usage: python tests/bench_prepare_data.py [rounds ...]
+"""
+import sys
+import os
+import time
+import tracemalloc
+import numpy as np
+
+# Add project root to sys.path to allow imports from src
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from src.analyst import prepare_data, SEQUENCE_LENGTH
+
+
+def legacy_prepare_data(history_data, sequence_length=5):
+    """The original loop-based implementation, kept here for comparison."""
+    draws = []
+    for row in history_data:
+        nums = sorted([v for v in row.values()])
+        draws.append(nums)
+
+    encoded_draws = []
+    for draw in draws:
+        encoded = [0] * 45
+        for num in draw:
+            if 1 <= num <= 45:
+                encoded[num-1] = 1
+        encoded_draws.append(encoded)
+
+    encoded_draws = np.array(encoded_draws)
+
+    X, y = [], []
+    for i in range(len(encoded_draws) - sequence_length):
+        X.append(encoded_draws[i:i+sequence_length])
+        y.append(encoded_draws[i+sequence_length])
+
+    return np.array(X).astype('float32'), np.array(y).astype('float32')
+
+
+def synthetic_history(n_rounds, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.argsort(rng.random((n_rounds, 45)), axis=1)[:, :6] + 1
+    return [{f'num{i+1}': int(v) for i, v in enumerate(row)} for row in nums]
+
+
+def measure(fn, history):
+    tracemalloc.start()
+    start = time.perf_counter()
+    X, y = fn(history, SEQUENCE_LENGTH)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return X, y, elapsed, peak
+
+
+def main(sizes):
+    print(f"{'rounds':>8} {'impl':>10} {'time (s)':>10} {'peak MB':>10}")
+    for n in sizes:
+        history = synthetic_history(n)
+        X_old, y_old, t_old, m_old = measure(legacy_prepare_data, history)
+        X_new, y_new, t_new, m_new = measure(prepare_data, history)
+        assert np.array_equal(X_old, X_new) and np.array_equal(y_old, y_new)
+        del X_old, y_old
+
+        print(f"{n:>8} {'legacy':>10} {t_old:>10.4f} {m_old / 2**20:>10.1f}")
+        print(f"{n:>8} {'numpy':>10} {t_new:>10.4f} {m_new / 2**20:>10.1f}")
+        print(f"{'':>8} {'speedup':>10} {t_old / t_new:>9.1f}x {m_old / max(m_new, 1):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1200, 100000])
@@ -0,0 +1,156 @@
+"""Benchmark: EXPLAIN plans and timings of hot queries before/after migration 3.
+
+Seeds a throwaway database with 1,200 rounds and a million predictions, runs the
+hot web/auditor queries without the new indexes, applies the migrations, and
+runs them again. Fails if any query still does a full table scan afterwards.
+
+Usage (needs a MariaDB server from .env; never point it at the live database):
+    BENCH_DB_NAME=lottodb_bench python tests/bench_query_plans.py [n_predictions]
+"""
+import sys
+import os
+import time
+import random
+
+# Add project root to sys.path to allow imports from src
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', 'lottodb_bench')
+if BENCH_DB_NAME == os.getenv('DB_NAME'):
+    sys.exit("BENCH_DB_NAME must differ from DB_NAME: this script drops and reseeds the database.")
+os.environ['DB_NAME'] = BENCH_DB_NAME
+
+from src.database import get_connection, init_db
+from src.migrations import run_migrations
+from src.bitmask import to_mask
+
+N_ROUNDS = 1200
+N_USERS = 2000
+BATCH = 10000
+TARGET_USER = 42
+
+HOT_QUERIES = [
+    ("home: recent predictions",
+     "SELECT * FROM my_predictions WHERE user_id = %s AND is_deleted = 0 ORDER BY created_at DESC LIMIT 5", (TARGET_USER,)),
+    ("mypage: first page",
+     "SELECT * FROM my_predictions WHERE user_id = %s AND is_deleted = 0 ORDER BY created_at DESC, id DESC LIMIT 21", (TARGET_USER,)),
+    ("mypage: round summary",
+     "SELECT round_no, COALESCE(rank_val, '미추첨') AS rank_val, COUNT(*) AS cnt FROM my_predictions "
+     "WHERE user_id = %s AND is_deleted = 0 AND round_no IN (%s, %s) GROUP BY round_no, COALESCE(rank_val, '미추첨')",
+     (TARGET_USER, N_ROUNDS, N_ROUNDS + 1)),
+    ("auditor: pending",
+     "SELECT id, round_no FROM my_predictions WHERE rank_val = %s", ("미추첨",)),
+    ("auditor: pending for round",
+     "SELECT id, round_no FROM my_predictions WHERE rank_val = %s AND round_no = %s", ("미추첨", N_ROUNDS + 1)),
+    ("history detail: prizes",
+     "SELECT * FROM prizes WHERE round_no = %s ORDER BY rank_no ASC", (N_ROUNDS // 2,)),
+    ("history detail: stores",
+     "SELECT * FROM winning_stores WHERE round_no = %s", (N_ROUNDS // 2,)),
+    ("collector: existing rounds",
+     "SELECT DISTINCT round_no FROM prizes", ()),
+]
+
+
+def recreate_database():
+    conn = pymysql.connect(
+        host=os.getenv('DB_HOST'), user=os.getenv('DB_USER'), password=os.getenv('DB_PASSWORD'),
+        port=int(os.getenv('DB_PORT', 3306)), charset='utf8mb4'
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB_NAME}`")
+        cursor.execute(f"CREATE DATABASE `{BENCH_DB_NAME}` CHARACTER SET utf8mb4")
+    conn.close()
+
+
+def seed(n_predictions):
+    rng = random.Random(0)
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.executemany(
+        "INSERT INTO users (username, password_hash, created_at) VALUES (%s, %s, %s)",
+        [(f"user{i}", "x", "2025-01-01 00:00:00") for i in range(1, N_USERS + 1)]
+    )
+    history = []
+    for r in range(1, N_ROUNDS + 1):
+        nums = sorted(rng.sample(range(1, 46), 6))
+        history.append((r, *nums, rng.randint(1, 45), "2025-01-01", to_mask(nums)))
+    cursor.executemany(
+        "INSERT INTO history (round_no, num1, num2, num3, num4, num5, num6, bonus, draw_date, combo_mask) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)", history
+    )
+    cursor.executemany(
+        "INSERT INTO prizes (round_no, rank_no, total_price, winner_count, win_amount) VALUES (%s, %s, %s, %s, %s)",
+        [(r, k, 1000, 1, 1000) for r in range(1, N_ROUNDS + 1) for k in range(1, 6)]
+    )
+    cursor.executemany(
+        "INSERT INTO winning_stores (round_no, store_name, choice_type, address) VALUES (%s, %s, %s, %s)",
+        [(r, f"store{s}", "자동", "서울") for r in range(1, N_ROUNDS + 1) for s in range(rng.randint(3, 15))]
+    )
+    conn.commit()
+
+    print(f"Seeding {n_predictions:,} predictions...")
+    for start in range(0, n_predictions, BATCH):
+        rows = []
+        for _ in range(min(BATCH, n_predictions - start)):
+            nums = sorted(rng.sample(range(1, 46), 6))
+            r = rng.randint(1, N_ROUNDS + 1)
+            rows.append((
+                r, *nums, to_mask(nums), "미추첨" if r > N_ROUNDS else "낙첨",
+                rng.randint(1, N_USERS), f"2025-01-01 00:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+                int(rng.random() < 0.05)
+            ))
+        cursor.executemany(
+            "INSERT INTO my_predictions (round_no, num1, num2, num3, num4, num5, num6, combo_mask, "
+            "rank_val, user_id, created_at, is_deleted) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            rows
+        )
+        conn.commit()
+    cursor.execute("ANALYZE TABLE my_predictions, prizes, winning_stores")
+    cursor.fetchall()
+    conn.close()
+
+
+def explain_all(label):
+    conn = get_connection()
+    cursor = conn.cursor()
+    results = {}
+    print(f"\n== {label} ==")
+    print(f"{'query':<30} {'type':<8} {'key':<38} {'rows':>9} {'ms':>9}")
+    for name, sql, params in HOT_QUERIES:
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = cursor.fetchall()[0]
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+        results[name] = plan
+        print(f"{name:<30} {str(plan['type']):<8} {str(plan['key']):<38} {str(plan['rows']):>9} {elapsed:>9.1f}")
+    conn.close()
+    return results
+
+
+def main(n_predictions):
+    recreate_database()
+    init_db(migrate=False)
+    run_migrations(target_version=2)
+    seed(n_predictions)
+
+    explain_all("before index migration")
+    run_migrations()
+    after = explain_all("after index migration")
+
+    full_scans = [name for name, plan in after.items() if plan['type'] == 'ALL']
+    if full_scans:
+        sys.exit(f"Full table scans remain: {full_scans}")
+    print("\nAll hot queries use an index.")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
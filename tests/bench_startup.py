@@ -0,0 +1,76 @@
+"""Benchmark: startup time and memory of a web worker importing src.web_app:app.
+
+Each run imports the app in a fresh interpreter (like a gunicorn worker boot)
+and reports wall time, peak RSS and whether TensorFlow got loaded. Pass a git
+ref with --baseline to measure that revision side by side (it is exported to a
+temporary directory with `git archive`).
+
+Usage:
+    python tests/bench_startup.py [--runs 5] [--baseline HEAD~1]
+"""
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from src.web_app import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def measure(root, runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=root, capture_output=True, text=True,
+            env={**os.environ, "PYTHONPATH": root, "TF_CPP_MIN_LOG_LEVEL": "3"}, check=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(r["seconds"] for r in results),
+        "max_rss_mb": statistics.median(r["max_rss_mb"] for r in results),
+        "tensorflow_loaded": results[-1]["tensorflow_loaded"],
+    }
+
+
+def export_ref(ref, target):
+    archive = subprocess.run(["git", "archive", ref], cwd=project_root, capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", target], input=archive.stdout, check=True)
+    # Templates/static are read at import time, data/ is shared state
+    os.makedirs(os.path.join(target, "data"), exist_ok=True)
+
+
+def report(label, result):
+    print(f"{label:<12} {result['seconds']:>8.2f} s {result['max_rss_mb']:>10.1f} MB   tensorflow={result['tensorflow_loaded']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="git ref to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    print(f"{'tree':<12} {'import':>10} {'peak RSS':>13}")
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_ref(args.baseline, tmp)
+            report(args.baseline, measure(tmp, args.runs))
+    report("working", measure(project_root, args.runs))
+
+
+if __name__ == "__main__":
+    main()
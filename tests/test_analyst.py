@@ -0,0 +1,69 @@
+import os
+import sys
+import types
+
+import numpy as np
+
+from src.analyst import (
+    SEQUENCE_LENGTH, LottoPredictor, prepare_windows, make_window_dataset, make_training_datasets,
+)
+
+
+def make_history(n_rounds, seed=0):
+    rng = np.random.default_rng(seed)
+    encoded = np.zeros((n_rounds, 45), dtype=np.uint8)
+    for r in range(n_rounds):
+        encoded[r, rng.choice(45, 6, replace=False)] = 1
+    return encoded
+
+
+def test_window_dataset_matches_numpy_windows():
+    encoded = make_history(60)
+    X, y = prepare_windows(encoded, SEQUENCE_LENGTH)
+    batches = list(make_window_dataset(encoded, 0, len(X), batch_size=16))
+    assert np.array_equal(np.concatenate([b[0].numpy() for b in batches]), X)
+    assert np.array_equal(np.concatenate([b[1].numpy() for b in batches]), y)
+
+
+def test_validation_split_holds_out_newest_windows():
+    encoded = make_history(310)
+    train_ds, val_ds, n_train, n_val = make_training_datasets(encoded, validation_split=0.1)
+    assert (n_train, n_val) == (270, 30)
+    _, y = prepare_windows(encoded, SEQUENCE_LENGTH)
+    val_targets = np.concatenate([b[1].numpy() for b in val_ds])
+    assert np.array_equal(val_targets, y[270:])
+
+
+def test_small_history_skips_validation():
+    train_ds, val_ds, n_train, n_val = make_training_datasets(make_history(50))
+    assert val_ds is None and n_val == 0 and n_train == 40
+
+
+def test_predictor_reloads_only_when_model_content_changes(tmp_path, monkeypatch):
+    loads = []
+    fake_models = types.ModuleType('tensorflow.keras.models')
+    fake_models.load_model = lambda path: loads.append(path) or object()
+    monkeypatch.setitem(sys.modules, 'tensorflow.keras.models', fake_models)
+
+    path = tmp_path / 'model.keras'
+    path.write_bytes(b'weights-v1')
+    predictor = LottoPredictor(str(path))
+    first = predictor.get_model()
+    version = predictor.version
+    assert predictor.get_model() is first
+    assert len(loads) == 1
+
+    # Touching the file without changing its content keeps the loaded model
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert predictor.get_model() is first
+    assert len(loads) == 1
+
+    # Rewriting it hot-swaps the model exactly once
+    path.write_bytes(b'weights-v2')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    second = predictor.get_model()
+    assert second is not first
+    assert predictor.get_model() is second
+    assert len(loads) == 2
+    assert predictor.version != version
@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.auditor import calculate_rank, grade_predictions
+from src.bitmask import masks_from_array
+
+
+def test_grade_predictions_matches_calculate_rank():
+    rng = np.random.default_rng(0)
+    win_nums = [3, 11, 19, 27, 35, 43]
+    bonus = 7
+    preds = np.array([rng.choice(np.arange(1, 46), 6, replace=False) for _ in range(2000)])
+    # Make sure every rank is represented
+    preds[:5] = [
+        [3, 11, 19, 27, 35, 43],
+        [3, 11, 19, 27, 35, 7],
+        [3, 11, 19, 27, 35, 1],
+        [3, 11, 19, 27, 1, 2],
+        [3, 11, 19, 1, 2, 4],
+    ]
+
+    matched, bonus_matched, ranks = grade_predictions(masks_from_array(preds), win_nums, bonus)
+
+    for row, m, b, rank in zip(preds, matched, bonus_matched, ranks):
+        my_nums = set(row.tolist())
+        assert rank == calculate_rank(my_nums, set(win_nums), bonus)
+        assert m == len(my_nums & set(win_nums))
+        assert b == (bonus in my_nums)
+    assert ranks[:5].tolist() == ["1등", "2등", "3등", "4등", "5등"]
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import src.auth as auth
+from src.cache import TTLCache
+
+
+@pytest.fixture
+def users(tmp_path, monkeypatch):
+    rows = {'alice': {'id': 1, 'username': 'alice', 'password_hash': 'x', 'is_deleted': 0}}
+    lookups = []
+
+    def get_user(username):
+        lookups.append(username)
+        row = rows.get(username)
+        return dict(row) if row else None
+
+    monkeypatch.setattr(auth, 'get_user', get_user)
+    monkeypatch.setattr(auth, 'user_cache', TTLCache(max_entries=10, ttl=60))
+    monkeypatch.setattr(auth, 'USER_CACHE_GENERATION_PATH', str(tmp_path / 'user_cache_generation'))
+    return rows, lookups
+
+
+def current_user(username):
+    token = auth.create_access_token({"sub": username})
+    return asyncio.run(auth.get_current_user(token))
+
+
+def test_repeated_requests_do_not_hit_database(users):
+    rows, lookups = users
+    assert current_user('alice')['id'] == 1
+    assert current_user('alice')['id'] == 1
+    assert lookups == ['alice']
+
+
+def test_unknown_user_is_rejected_and_not_cached(users):
+    rows, lookups = users
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            current_user('bob')
+    assert lookups == ['bob', 'bob']
+
+
+def test_deleted_account_is_rejected_after_invalidation(users):
+    rows, lookups = users
+    current_user('alice')
+    rows['alice']['is_deleted'] = 1
+    auth.invalidate_user('alice')
+    with pytest.raises(HTTPException):
+        current_user('alice')
+
+
+def test_login_rehashes_password_when_cost_changes(monkeypatch):
+    from passlib.context import CryptContext
+
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    row = {'id': 7, 'username': 'carol', 'password_hash': old_hash, 'is_deleted': 0}
+    updates = []
+    monkeypatch.setattr(auth, 'pwd_context', CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    monkeypatch.setattr(auth, 'get_user', lambda username: dict(row))
+    monkeypatch.setattr(auth, 'update_password_hash', lambda user_id, h: updates.append((user_id, h)))
+
+    user = asyncio.run(auth.authenticate_user_async('carol', 'secret'))
+    assert user['id'] == 7
+    assert len(updates) == 1 and updates[0][1].startswith('$2b$05$')
+    assert auth.pwd_context.verify('secret', updates[0][1])
+
+    assert asyncio.run(auth.authenticate_user_async('carol', 'wrong')) is False
+    assert len(updates) == 1
@@ -0,0 +1,73 @@
+import numpy as np
+
+import src.backtest as backtest
+from src.backtest import (
+    FrequencyStrategy, cached_probabilities, make_backtest_data, run_backtest,
+)
+
+
+def make_data(n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    nums = np.sort(np.argsort(rng.random((n, 45)), axis=1)[:, :6] + 1, axis=1)
+    bonus = np.array([np.setdiff1d(np.arange(1, 46), row)[0] for row in nums])
+    prizes = np.full((n, 6), np.nan)
+    prizes[:, 1] = 2_000_000_000
+    return make_backtest_data(np.arange(1, n + 1), nums, bonus, prizes)
+
+
+class OracleStrategy:
+    """Puts all weight on the round's real numbers, so every set wins 1st prize."""
+
+    name = 'oracle'
+
+    def __init__(self):
+        self.calls = []
+
+    def cache_key(self, start):
+        return f'oracle-{start}'
+
+    def probabilities(self, encoded, indices, start, workers):
+        self.calls.append(list(indices))
+        probs = np.full((len(indices), 45), 1e-9)
+        probs[encoded[indices] == 1] = 1.0
+        return indices, probs
+
+
+def test_make_backtest_data_fills_fixed_prizes():
+    data = make_data()
+    assert (data['prizes'][:, 1] == 2_000_000_000).all()
+    assert (data['prizes'][:, 4] == 50000).all() and (data['prizes'][:, 5] == 5000).all()
+    assert data['missing_prizes'] == 2 * 150  # 2nd and 3rd
+    assert data['encoded'].sum(axis=1).tolist() == [6] * 150
+
+
+def test_frequency_strategy_only_sees_earlier_draws():
+    data = make_data()
+    indices, probs = FrequencyStrategy().probabilities(data['encoded'], [100, 120], 100, 1)
+    assert indices == [100, 120]
+    expected = data['encoded'][:120].sum(axis=0) + 1
+    assert np.allclose(probs[1], expected / expected.sum())
+
+
+def test_oracle_wins_every_round_and_is_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(backtest, 'BACKTEST_CACHE_DIR', str(tmp_path))
+    monkeypatch.setitem(backtest.STRATEGIES, 'oracle', OracleStrategy)
+    data = make_data()
+
+    report = run_backtest(strategies=['oracle', 'uniform'], num_sets=1, data=data, workers=1)
+    oracle, uniform = report['results']
+    assert oracle['rounds'] == 50 and oracle['sets'] == 50
+    assert oracle['wins']['1등'] == 50
+    assert oracle['mean_matched'] == 6
+    assert oracle['prize_per_set'] == 2_000_000_000
+    assert uniform['wins']['1등'] == 0
+    assert uniform['uniform_expected_prize_per_set'] > 0
+
+    # Cached vectors are reused until the history before a round changes
+    strategy = OracleStrategy()
+    cached_probabilities(strategy, data['encoded'], range(100, 150), 100, 1)
+    assert strategy.calls == []
+    changed = data['encoded'].copy()
+    changed[140] = np.roll(changed[140], 1)
+    cached_probabilities(strategy, changed, range(100, 150), 100, 1)
+    assert strategy.calls == [list(range(141, 150))]
@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.bitmask import (
+    from_mask, mask_to_row, masks_from_array, match_counts, number_counts,
+    popcount, row_to_mask, to_mask,
+)
+
+
+def test_mask_round_trip():
+    nums = [1, 7, 19, 33, 44, 45]
+    mask = to_mask(nums)
+    assert mask < 2 ** 45
+    assert from_mask(mask) == nums
+    row = mask_to_row(mask)
+    assert row == {'num1': 1, 'num2': 7, 'num3': 19, 'num4': 33, 'num5': 44, 'num6': 45}
+    assert row_to_mask(row) == mask
+
+
+def test_vectorized_helpers_match_scalar():
+    rng = np.random.default_rng(1)
+    combos = np.array([np.sort(rng.choice(np.arange(1, 46), 6, replace=False)) for _ in range(500)])
+    masks = masks_from_array(combos)
+    assert masks.dtype == np.uint64
+    assert [int(m) for m in masks] == [to_mask(c) for c in combos]
+    assert popcount(masks).tolist() == [6] * 500
+
+    win = combos[0]
+    expected = [len(set(c) & set(win)) for c in combos]
+    assert match_counts(masks, to_mask(win)).tolist() == expected
+
+    counts = number_counts(masks)
+    assert counts.tolist() == np.bincount(combos.ravel(), minlength=46)[1:].tolist()
@@ -0,0 +1,58 @@
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import src.cache as cache
+from src.cache import TTLCache, SQLiteCache, ResponseCacheMiddleware
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    c = TTLCache(max_entries=2, ttl=60)
+    c.set('a', 1)
+    c.set('b', 2)
+    assert c.get('a') == 1  # 'b' is now the oldest
+    c.set('c', 3)
+    assert c.get('b') is None
+    assert c.get('a') == 1 and c.get('c') == 3
+
+
+def test_ttl_cache_expires_entries():
+    c = TTLCache(max_entries=10, ttl=60)
+    c.set('a', 1, ttl=0.01)
+    time.sleep(0.02)
+    assert c.get('a', 'missing') == 'missing'
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    writer = SQLiteCache(path, max_entries=10, ttl=60)
+    reader = SQLiteCache(path, max_entries=10, ttl=60)
+    writer.set('page', {'round_no': 1160, 'nums': [1, 2, 3]})
+    assert reader.get('page') == {'round_no': 1160, 'nums': [1, 2, 3]}
+    writer.clear()
+    assert reader.get('page') is None
+
+
+def test_middleware_caches_anonymous_pages_until_invalidated(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_GENERATION_PATH', str(tmp_path / 'cache_generation'))
+    monkeypatch.setattr(cache, '_response_cache', TTLCache(max_entries=10, ttl=60))
+    hits = []
+
+    def page(request):
+        hits.append(request.url.path)
+        return PlainTextResponse(f"render {len(hits)}")
+
+    app = Starlette(routes=[Route('/', page), Route('/private', page)])
+    app.add_middleware(ResponseCacheMiddleware, paths=[r'/'], version=lambda: 1160)
+    client = TestClient(app)
+
+    assert client.get('/').text == 'render 1'
+    assert client.get('/').text == 'render 1'
+    assert client.get('/', headers={'cookie': 'access_token=x'}).text == 'render 2'
+    assert client.get('/private').text == 'render 3'
+
+    cache.invalidate_response_cache()
+    assert client.get('/').text == 'render 4'
@@ -0,0 +1,131 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from src import collector
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "dhlottery_round.html")
+
+
+class StubLottoHandler(BaseHTTPRequestHandler):
+    """Serves the recorded result page for rounds <= latest_round."""
+
+    page = open(FIXTURE, encoding="utf-8").read().encode("utf-8")
+    latest_round = 5
+    flaky_rounds = set()
+    hits = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        round_no = int(parse_qs(urlparse(self.path).query)["drwNo"][0])
+        with self.lock:
+            self.hits[round_no] = self.hits.get(round_no, 0) + 1
+            fail = round_no in self.flaky_rounds and self.hits[round_no] == 1
+
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = self.page if round_no <= self.latest_round else "<html><title>로또6/45</title></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    StubLottoHandler.hits = {}
+    StubLottoHandler.flaky_rounds = {3}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLottoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(collector, "DHLOTTERY_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    yield StubLottoHandler
+    server.shutdown()
+
+
+def test_parse_lotto_page_matches_recorded_page():
+    data = collector.parse_lotto_page(open(FIXTURE, encoding="utf-8").read(), 1160)
+    assert data["nums"] == [7, 13, 18, 24, 33, 42]
+    assert data["bonus"] == 9
+    assert "2025년 02월 22일" in data["date"]
+    assert data["meta"] == {"auto": 8, "manual": 3, "semi_auto": 1}
+    assert [p["rank"] for p in data["prizes"]] == [1, 2, 3, 4, 5]
+    assert data["prizes"][0]["per_person"] == 2282160500
+
+
+def test_fetch_rounds_concurrently_retries_and_saves(stub_server):
+    saved = []
+    failed = collector.fetch_rounds_concurrently(
+        range(1, 8), save=saved.append, concurrency=4, rate=100, retries=2, backoff=0.01
+    )
+
+    assert sorted(d["round_no"] for d in saved) == [1, 2, 3, 4, 5]
+    assert failed == [6, 7]  # not drawn yet
+    assert stub_server.hits[3] == 2  # 503 once, then retried
+    assert saved[0] == collector.parse_lotto_page(stub_server.page.decode("utf-8"), saved[0]["round_no"])
+
+
+def test_token_bucket_limits_rate():
+    bucket = collector.TokenBucket(rate=50)
+    start = collector.time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert collector.time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_batch_writer_flushes_in_batches():
+    batches = []
+    with collector.BatchWriter(batches.append, batch_size=3) as writer:
+        for i in range(7):
+            writer.add(i)
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+class FakeStoreDB:
+    """Connection stand-in: a batch containing an over-long store name fails as a whole."""
+
+    def __init__(self):
+        self.committed = []
+        self.pending = []
+
+    def cursor(self):
+        return self
+
+    def executemany(self, sql, rows):
+        if any(len(row[1]) > 20 for row in rows):
+            raise ValueError("Data too long for column 'store_name'")
+        self.pending.extend(rows)
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+def test_save_stores_to_db_keeps_rows_next_to_a_bad_one(monkeypatch):
+    db = FakeStoreDB()
+    monkeypatch.setattr(collector, "get_connection", lambda: db)
+    monkeypatch.setattr(collector, "invalidate_response_cache", lambda: None)
+
+    rows = [
+        (1, "행운복권", "자동", "서울"),
+        (2, "x" * 50, "수동", "부산"),
+        (3, "대박로또", "자동", "대구"),
+    ]
+    collector.save_stores_to_db(rows)
+    assert db.committed == [rows[0], rows[2]]
@@ -0,0 +1,102 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src import database, history_store
+from src.bitmask import masks_from_array, match_counts, to_mask
+from src.combo_index import (
+    N_COMBOS, build_combo_index, build_tables, compute_features, get_combo_index,
+    rank, unrank,
+)
+
+
+def make_draws(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    draws = np.sort(np.argsort(rng.random((n, 45)), axis=1)[:, :6], axis=1)
+    draws[1] = draws[0]  # a repeated draw exercises the 6-match counts
+    return draws
+
+
+def brute_force(nums, draws):
+    matches = match_counts(masks_from_array(draws + 1), to_mask(nums))
+    return {
+        'max_match': int(matches.max()),
+        'hits3': int((matches >= 3).sum()),
+        'hits4': int((matches >= 4).sum()),
+    }
+
+
+def test_rank_follows_itertools_order():
+    first = list(itertools.islice(itertools.combinations(range(1, 46), 6), 1000))
+    assert [rank(c) for c in first] == list(range(1000))
+    assert rank([40, 41, 42, 43, 44, 45]) == N_COMBOS - 1
+    for r in (0, 12345, 4_000_000, N_COMBOS - 1):
+        assert rank(unrank(r)) == r
+    with pytest.raises(ValueError):
+        rank([1, 1, 2, 3, 4, 5])
+
+
+def test_features_match_brute_force():
+    draws = make_draws()
+    tables = build_tables(draws)
+    rng = np.random.default_rng(1)
+    combos = np.sort(np.argsort(rng.random((3000, 45)), axis=1)[:, :6], axis=1)
+    # include exact repeats and five-number near misses of a draw
+    near_miss = draws[0].copy()
+    near_miss[-1] = next(n for n in range(45) if n not in draws[0])
+    combos = np.vstack([combos, draws[:20], np.sort(near_miss)]).astype(np.uint8)
+
+    features = compute_features(combos, tables)
+    for i, combo in enumerate(combos):
+        nums = (combo.astype(int) + 1).tolist()
+        expected = brute_force(nums, draws)
+        assert {k: int(features[k][i]) for k in expected} == expected, nums
+        assert features['sum'][i] == sum(nums)
+        assert features['odd'][i] == sum(n % 2 for n in nums)
+
+
+@pytest.fixture(scope='module')
+def combo_index(tmp_path_factory):
+    # Built the way `main.py combo_index` does: from the encoded history store
+    path = tmp_path_factory.mktemp('combo_index')
+    draws = make_draws()
+    encoded = np.zeros((len(draws), 45), dtype=np.uint8)
+    encoded[np.arange(len(draws))[:, None], draws] = 1
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(history_store, 'load_encoded_history', lambda: encoded)
+        mp.setattr(database, 'get_latest_round', lambda: 1234)
+        build_combo_index(str(path))
+    return get_combo_index(str(path)), draws
+
+
+def test_build_loads_history_from_store(combo_index):
+    index, draws = combo_index
+    assert index.meta['last_round'] == 1234
+    assert index.meta['draws'] == len(draws)
+    assert index.meta['combinations'] == N_COMBOS
+
+
+def test_index_queries(combo_index):
+    index, draws = combo_index
+
+    repeated = (draws[0] + 1).tolist()
+    stats = index.lookup(repeated)
+    assert stats['nums'] == repeated
+    assert stats['max_match'] == 6
+    assert stats['hits4'] >= 2
+
+    assert index.count(max_match=(6, 6)) == len({tuple(d) for d in draws.tolist()})
+    assert sum(index.distribution('odd')) == N_COMBOS
+
+    top = index.top('hits3', n=5, sum=(100, 150), odd=(3, 3))
+    assert len(top) == 5
+    assert all(100 <= t['sum'] <= 150 and t['odd'] == 3 for t in top)
+    for t in top:
+        assert t['hits3'] == brute_force(t['nums'], draws)['hits3']
+    assert [t['hits3'] for t in top] == sorted((t['hits3'] for t in top), reverse=True)
+
+    weighted = index.top({'hits3': 1, 'hits4': 10}, n=3)
+    assert weighted[0]['score'] == weighted[0]['hits3'] + 10 * weighted[0]['hits4']
+    with pytest.raises(ValueError):
+        index.top('bogus')
@@ -0,0 +1,116 @@
+import pytest
+
+from src.database import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.pings = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        return "cursor"
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = dict(min_size=0, max_size=2, recycle=3600, ping_interval=30, timeout=0.05)
+    options.update(kwargs)
+    return ConnectionPool(connect=connect, **options), opened
+
+
+def test_close_returns_connection_to_pool():
+    pool, opened = make_pool()
+    conn = pool.acquire()
+    assert conn.cursor() == "cursor"
+    conn.close()
+    assert opened[0].rollbacks == 1 and not opened[0].closed
+
+    again = pool.acquire()
+    assert again._conn is opened[0]
+    assert len(opened) == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    held.close()
+    pool.acquire()
+
+
+def test_recycles_old_connections():
+    pool, opened = make_pool(recycle=0)
+    pool.acquire().close()
+    pool.acquire()
+    assert opened[0].closed
+    assert len(opened) == 2
+
+
+def test_pings_idle_connections():
+    pool, opened = make_pool(ping_interval=0)
+    pool.acquire().close()
+    pool.acquire()
+    assert opened[0].pings == 1
+
+
+def test_min_size_preopens_connections():
+    pool, opened = make_pool(min_size=2)
+    assert len(opened) == 2
+    pool.acquire()
+    pool.acquire()
+    assert len(opened) == 2
+
+
+class CountingCursor:
+    def __init__(self, state):
+        self.state = state
+
+    def execute(self, sql, params=None):
+        self.state['queries'] += 1
+
+    def fetchone(self):
+        return {'max_round': self.state['max_round']}
+
+
+def test_latest_round_is_cached_until_marker_changes(tmp_path, monkeypatch):
+    import src.database as database
+
+    state = {'queries': 0, 'max_round': 1160}
+
+    class Conn:
+        def cursor(self):
+            return CountingCursor(state)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(database, 'get_connection', lambda: Conn())
+    monkeypatch.setattr(database, 'LATEST_ROUND_MARKER_PATH', str(tmp_path / 'latest_round'))
+    monkeypatch.setattr(database, '_latest_round_cache', {'value': None, 'stamp': None, 'checked_at': 0.0})
+
+    assert database.get_latest_round() == 1160
+    state['max_round'] = 1161
+    assert database.get_latest_round() == 1160
+    assert state['queries'] == 1
+
+    database.publish_latest_round(1161)
+    assert database.get_latest_round() == 1161
+    assert state['queries'] == 2
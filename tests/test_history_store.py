@@ -0,0 +1,38 @@
+import numpy as np
+
+from src import history_store
+from src.history_store import append_draw, load_encoded_history, open_store
+
+
+def test_append_draw_writes_round_slot(tmp_path):
+    path = str(tmp_path / "history.u8")
+    append_draw(1, [1, 2, 3, 4, 5, 6], path)
+    append_draw(3, [40, 41, 42, 43, 44, 45], path)
+
+    encoded = open_store(path)
+    assert encoded.shape == (3, 45)
+    assert encoded[0, :6].tolist() == [1] * 6
+    assert encoded[1].sum() == 0  # round 2 not written yet
+    assert encoded[2, 39:].tolist() == [1] * 6
+
+
+def test_load_encoded_history_resyncs_on_gap(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.u8")
+    append_draw(1, [1, 2, 3, 4, 5, 6], path)
+    append_draw(3, [7, 8, 9, 10, 11, 12], path)
+
+    resynced = []
+    def fake_resync(p):
+        resynced.append(p)
+        append_draw(2, [13, 14, 15, 16, 17, 18], p)
+
+    monkeypatch.setattr(history_store, "_history_state", lambda: (3, 3))
+    monkeypatch.setattr(history_store, "resync_from_db", fake_resync)
+
+    encoded = load_encoded_history(path)
+    assert resynced == [path]
+    assert np.array_equal(encoded.sum(axis=1), [6, 6, 6])
+
+    # In sync now: served straight from the memory map.
+    assert isinstance(load_encoded_history(path), np.memmap)
+    assert len(resynced) == 1
@@ -0,0 +1,86 @@
+import itertools
+import threading
+
+import numpy as np
+
+import src.inference as inference
+from src.bitmask import to_mask
+from src.inference import PredictionService, _PendingRequest
+
+
+class FakePredictor:
+    def __init__(self, probs):
+        self.version = 'v1'
+        self.probs = probs
+        self.calls = 0
+
+    def get_model(self):
+        return object()
+
+    def predict_probs(self, history):
+        self.calls += 1
+        return self.probs
+
+
+def make_service(monkeypatch, probs=None, batch_window=0.0):
+    monkeypatch.setattr(inference, 'load_encoded_history', lambda: np.zeros((10, 45)))
+    predictor = FakePredictor(np.full(45, 1 / 45) if probs is None else probs)
+    return PredictionService(predictor, batch_window=batch_window), predictor
+
+
+def test_probs_are_computed_once_per_version_and_round(monkeypatch):
+    service, predictor = make_service(monkeypatch)
+    service.get_probs(1000)
+    service.get_probs(1000)
+    assert predictor.calls == 1
+
+    service.get_probs(1001)
+    assert predictor.calls == 2
+
+    # A hot-swapped model has a new version: the same round is recomputed
+    predictor.version = 'v2'
+    service.get_probs(1001)
+    assert predictor.calls == 3
+
+
+def test_concurrent_requests_share_one_batch(monkeypatch):
+    service, predictor = make_service(monkeypatch, batch_window=0.2)
+    results = [None] * 8
+
+    def worker(i):
+        results[i] = service.generate(1000, num_sets=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert predictor.calls == 1
+    picks = [tuple(nums) for result in results for nums in result]
+    assert len(picks) == 40
+    assert len(set(picks)) == 40
+    assert all(list(p) == sorted(p) and len(set(p)) == 6 for p in picks)
+
+
+def test_generate_respects_exclude(monkeypatch):
+    service, _ = make_service(monkeypatch)
+    excluded = set(map(tuple, service.generate(1000, num_sets=20)))
+    masks = {to_mask(nums) for nums in excluded}
+    picks = service.generate(1000, num_sets=20, exclude=masks)
+    assert len(picks) == 20
+    assert not excluded & set(map(tuple, picks))
+
+
+def test_fill_requests_tops_up_after_exclusions(monkeypatch):
+    # Only numbers 1-7 have weight: seven possible sets, three of them excluded,
+    # so the shared pool runs short and the remaining four come from the top-up
+    probs = np.zeros(45)
+    probs[:7] = 1 / 7
+    service, _ = make_service(monkeypatch, probs=probs)
+    combos = [list(c) for c in itertools.combinations(range(1, 8), 6)]
+    exclude = {to_mask(c) for c in combos[:3]}
+    request = _PendingRequest(1000, 4, exclude)
+
+    service._fill_requests(probs, [request])
+    assert sorted(request.result) == sorted(combos[3:])
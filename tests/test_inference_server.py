@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import src.inference_server as inference_server
+from src.inference_server import (
+    InferenceServer, InferenceClient, InferenceUnavailable, InferenceError,
+)
+
+
+class FakeService:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, last_round, num_sets=5, exclude=None):
+        if last_round < 0:
+            raise RuntimeError("no model")
+        self.calls.append((last_round, num_sets, exclude))
+        return [[1, 2, 3, 4, 5, 6 + i] for i in range(num_sets)]
+
+
+@pytest.fixture
+def server(tmp_path):
+    service = FakeService()
+    srv = InferenceServer(str(tmp_path / 'inference.sock'), service=service)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_generate_round_trip(server):
+    client = InferenceClient(server.path, timeout=5)
+    assert client.ping()
+    result = client.generate(1160, num_sets=2, exclude={63, 127})
+    assert result == [[1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 7]]
+    assert server.service.calls == [(1160, 2, {63, 127})]
+
+
+def test_server_errors_are_reported(server):
+    client = InferenceClient(server.path, timeout=5)
+    with pytest.raises(InferenceError, match="no model"):
+        client.generate(-1)
+
+
+def test_missing_worker_falls_back_to_local_service(tmp_path, monkeypatch):
+    with pytest.raises(InferenceUnavailable):
+        InferenceClient(str(tmp_path / 'missing.sock'), timeout=1).ping()
+
+    local = FakeService()
+    monkeypatch.setattr(inference_server, '_client', InferenceClient(str(tmp_path / 'missing.sock'), timeout=1))
+    monkeypatch.setattr(inference_server, '_unavailable_until', {'t': 0.0})
+    import src.inference as inference
+    monkeypatch.setattr(inference, 'get_prediction_service', lambda: local)
+
+    assert len(inference_server.generate_predictions(1160, num_sets=3)) == 3
+    assert inference_server._unavailable_until['t'] > 0
+    assert local.calls == [(1160, 3, None)]
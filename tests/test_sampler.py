@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.bitmask import masks_from_array, to_mask
+from src.sampler import sample_combinations, sample_unique
+
+
+def _skewed_probs():
+    probs = np.ones(45)
+    probs[:6] = 20.0  # numbers 1-6 strongly favoured
+    return probs / probs.sum()
+
+
+def test_sample_combinations_shape_and_seed():
+    probs = _skewed_probs()
+    picks = sample_combinations(probs, 1000, rng=7)
+    assert picks.shape == (1000, 6)
+    assert picks.min() >= 1 and picks.max() <= 45
+    # sorted, no repeated number inside a set
+    assert (np.diff(picks, axis=1) > 0).all()
+    assert np.array_equal(picks, sample_combinations(probs, 1000, rng=7))
+
+    counts = np.bincount(picks.ravel(), minlength=46)[1:]
+    assert counts[:6].min() > counts[6:].max()
+
+
+def test_sample_unique_is_distinct_and_respects_exclude():
+    probs = _skewed_probs()
+    favourite = to_mask([1, 2, 3, 4, 5, 6])
+    picks = sample_unique(probs, 5000, exclude={favourite}, rng=3)
+    assert picks.shape == (5000, 6)
+    masks = masks_from_array(picks)
+    assert len(set(masks.tolist())) == 5000
+    assert favourite not in set(masks.tolist())
+    assert np.array_equal(picks, sample_unique(probs, 5000, exclude={favourite}, rng=3))
+
+
+def test_sample_unique_stops_when_distribution_is_exhausted():
+    # Only numbers 1-7 have weight: at most C(7, 6) = 7 distinct sets
+    probs = np.zeros(45)
+    probs[:7] = 1 / 7
+    picks = sample_unique(probs, 20, rng=0)
+    assert len(picks) == 7
+    assert picks.max() <= 7
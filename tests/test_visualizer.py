@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+
+import src.visualizer as visualizer
+from src.visualizer import (
+    SNAPSHOT_VERSION, get_analytics_snapshot, get_trend_columns, rebuild_analytics_snapshot,
+    slice_trend,
+)
+
+
+def make_df(rounds):
+    return pd.DataFrame([
+        {'round_no': r, 'num1': 1, 'num2': 2, 'num3': 3, 'num4': 4, 'num5': 5, 'num6': r % 45 + 1}
+        for r in rounds
+    ])
+
+
+def test_trend_columns_are_oldest_first():
+    trend = get_trend_columns(df=make_df([3, 1, 2]))
+    assert trend['rounds'] == [1, 2, 3]
+    assert len(trend['nums']) == 6
+    assert trend['nums'][5] == [2, 3, 4]
+
+
+def test_slice_trend_keeps_latest_round_when_downsampling():
+    trend = get_trend_columns(df=make_df(range(1, 101)))
+    sliced = slice_trend(trend, start=50, end=100, step=10)
+    assert sliced['rounds'] == [50, 60, 70, 80, 90, 100]
+    assert sliced['nums'][5] == [r % 45 + 1 for r in sliced['rounds']]
+
+
+def test_slice_trend_range_outside_history_is_empty():
+    trend = get_trend_columns(df=make_df(range(1, 11)))
+    sliced = slice_trend(trend, start=20)
+    assert sliced['rounds'] == []
+    assert all(col == [] for col in sliced['nums'])
+
+
+def stub_snapshot(monkeypatch):
+    """Replaces the DB-backed snapshot build; returns the list of rounds built."""
+    builds = []
+
+    def build():
+        builds.append(1160 + len(builds))
+        return {
+            'version': SNAPSHOT_VERSION, 'last_round': builds[-1], 'generated_at': '',
+            'freq_data': {1: 10}, 'recent_freq_data': {1: 2},
+            'trend': {'rounds': [], 'nums': [[] for _ in range(6)]},
+            'winners': {'rounds': [], 'counts': []},
+        }
+
+    monkeypatch.setattr(visualizer, 'build_analytics_snapshot', build)
+    monkeypatch.setattr(visualizer, '_snapshot_cache', {'stamp': None, 'data': None, 'etag': None})
+    return builds
+
+
+def test_snapshot_is_built_once_and_rebuilt_on_demand(tmp_path, monkeypatch):
+    builds = stub_snapshot(monkeypatch)
+    path = str(tmp_path / 'analytics_snapshot.json')
+
+    snapshot, etag = get_analytics_snapshot(path)
+    assert builds == [1160] and snapshot['last_round'] == 1160
+    assert get_analytics_snapshot(path) == (snapshot, etag)
+    assert len(builds) == 1
+
+    rebuild_analytics_snapshot(path)
+    snapshot, new_etag = get_analytics_snapshot(path)
+    assert snapshot['last_round'] == 1161
+    assert new_etag != etag
+
+
+def test_snapshot_from_older_release_is_rebuilt(tmp_path, monkeypatch):
+    builds = stub_snapshot(monkeypatch)
+    path = tmp_path / 'analytics_snapshot.json'
+    path.write_text(json.dumps({'version': SNAPSHOT_VERSION - 1, 'last_round': 1000}))
+
+    snapshot, _ = get_analytics_snapshot(str(path))
+    assert builds == [1160]
+    assert snapshot['version'] == SNAPSHOT_VERSION and snapshot['last_round'] == 1160
+    assert json.loads(path.read_text())['last_round'] == 1160
@@ -41,6 +41,40 @@ def test_routes():
         else:
             print("FAILED: Stores table not found")
 
+def test_executor_metrics_require_token(monkeypatch):
+    import src.web_app as web_app
+
+    monkeypatch.setattr(web_app, "METRICS_TOKEN", "")
+    assert client.get("/metrics/executors").status_code == 404
+
+    monkeypatch.setattr(web_app, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics/executors").status_code == 401
+    assert client.get("/metrics/executors", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    resp = client.get("/metrics/executors", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert {e["name"] for e in resp.json()["executors"]} == {"predict", "bcrypt", "combo"}
+
+def test_analysis_etag_changes_with_snapshot(tmp_path, monkeypatch):
+    import src.web_app as web_app
+    from src import visualizer
+    from tests.test_visualizer import stub_snapshot
+
+    stub_snapshot(monkeypatch)
+    path = str(tmp_path / "analytics_snapshot.json")
+    monkeypatch.setattr(web_app, "get_analytics_snapshot", lambda: visualizer.get_analytics_snapshot(path))
+
+    resp = client.get("/analysis")
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    resp = client.get("/analysis", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+
+    visualizer.rebuild_analytics_snapshot(path)
+    resp = client.get("/analysis", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+
 if __name__ == "__main__":
     test_routes()
 
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import pytest
+
+from src.workers import BoundedExecutor, WorkerPoolSaturated
+
+
+def test_bounded_executor_rejects_when_saturated():
+    release = threading.Event()
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, timeout=5)
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        second = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(WorkerPoolSaturated):
+            await executor.run(release.wait)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == [True, True]
+
+    stats = executor.stats()
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    # The second job sat in the queue behind the first one
+    assert stats["queue_wait_max_ms"] >= 40
+
+
+def test_bounded_executor_times_out():
+    release = threading.Event()
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(release.wait)
+
+    asyncio.run(scenario())
+    release.set()
+
+
+def test_bounded_executor_counts_only_finished_jobs():
+    release = threading.Event()
+    executor = BoundedExecutor("test", max_workers=2, max_queue=0, timeout=5)
+
+    def boom():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        with pytest.raises(RuntimeError):
+            await executor.run(boom)
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        assert stats["completed"] == 0  # still running
+        assert stats["failed"] == 1
+        release.set()
+        await running
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["failed"] == 1
+    assert stats["in_flight"] == 0